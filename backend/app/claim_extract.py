@@ -1,57 +1,108 @@
 """
 Claim extraction module: Extract independent claims from short report using LLM
 """
+import hashlib
 import logging
 import json
 import re
-from typing import List, Dict, Optional
+import sys
+from typing import AsyncIterator, List, Dict, Optional
 
-from app.config import (
-    LLM_MODEL, TEMPERATURE, MIN_CLAIMS, MAX_CLAIMS, openai_client
-)
+from app.config import LLM_MODEL, TEMPERATURE, MIN_CLAIMS, MAX_CLAIMS
 from app.models import Claim
 from app.utils import deduplicate_claims, generate_claim_id, logger
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the extraction prompt or response handling changes, so claims
+# extracted the old way aren't reused for identical documents
+EXTRACTION_PROMPT_VERSION = 1
 
-def call_llm(messages: List[Dict], temperature: float = TEMPERATURE, max_tokens: int = 2000) -> str:
+
+def llm_connection_errors() -> tuple:
+    """
+    Exception types raised when the OpenAI API can't be reached (timeouts included)
+
+    For use in except clauses. openai is imported lazily, so if it hasn't been loaded
+    no call can have failed yet and the tuple is empty.
+    """
+    openai = sys.modules.get("openai")
+    return (openai.APIConnectionError,) if openai is not None else ()
+
+
+async def call_llm(
+    client,
+    messages: List[Dict],
+    temperature: float = TEMPERATURE,
+    max_tokens: int = 2000,
+    prompt_cache_key: Optional[str] = None,
+    model: Optional[str] = None
+) -> str:
     """
     Call OpenAI API
 
     Args:
+        client: Shared AsyncOpenAI client (see config.create_async_openai_client)
         messages: List of message dicts with 'role' and 'content'
         temperature: Sampling temperature
         max_tokens: Maximum tokens to generate
+        prompt_cache_key: Optional hint that groups requests sharing a prompt prefix,
+            improving OpenAI prompt-cache hit rates
+        model: Model to use (default: LLM_MODEL)
 
     Returns:
         Generated text content
     """
-    if not openai_client:
+    if not client:
         raise ConnectionError("OpenAI client not initialized. Please set OPENAI_API_KEY.")
 
-    response = openai_client.chat.completions.create(
-        model=LLM_MODEL,
+    response = await client.chat.completions.create(
+        model=model or LLM_MODEL,
         messages=messages,
         temperature=temperature,
-        max_tokens=max_tokens
+        max_tokens=max_tokens,
+        extra_body={"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
     )
     return response.choices[0].message.content or ""
 
 
-def extract_claims_from_text(text: str, pages: List[tuple]) -> List[Claim]:
+async def call_llm_stream(
+    client,
+    messages: List[Dict],
+    temperature: float = TEMPERATURE,
+    max_tokens: int = 2000,
+    prompt_cache_key: Optional[str] = None,
+    model: Optional[str] = None
+) -> AsyncIterator[str]:
     """
-    Extract independent claims from report text using LLM
-    
-    Args:
-        text: Full text of the report (first 10 pages)
-        pages: List of (page_number, page_text) tuples
-    
-    Returns:
-        List of Claim objects
+    Call OpenAI API with streaming, yielding text deltas as they arrive
+
+    Takes the same arguments as call_llm; joining the yielded deltas gives the same text.
     """
-    logger.info("Extracting claims from report text using LLM")
-    
+    if not client:
+        raise ConnectionError("OpenAI client not initialized. Please set OPENAI_API_KEY.")
+
+    stream = await client.chat.completions.create(
+        model=model or LLM_MODEL,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        extra_body={"prompt_cache_key": prompt_cache_key} if prompt_cache_key else None
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def extraction_cache_key(doc_hash: str) -> str:
+    """Key for reusing a document's claims: its text hash plus everything that shapes the LLM's answer"""
+    payload = f"{doc_hash}:{LLM_MODEL}:{TEMPERATURE}:{EXTRACTION_PROMPT_VERSION}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _build_extraction_messages(text: str, pages: List[tuple]) -> List[Dict]:
+    """Build the chat messages asking the LLM to extract claims from the report"""
     # Build page context for better page number attribution
     page_context = "\n".join([f"Page {pnum}: {ptext[:500]}..." for pnum, ptext in pages[:5]])
     
@@ -93,110 +144,138 @@ Claim types:
 
 Return ONLY valid JSON, no additional text."""
 
-    try:
-        # Call OpenAI API
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a financial analyst expert at extracting structured claims from reports. Always return valid JSON."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
+    return [
+        {
+            "role": "system",
+            "content": "You are a financial analyst expert at extracting structured claims from reports. Always return valid JSON."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
 
-        logger.info(f"Calling OpenAI API with model: {LLM_MODEL}")
-        content = call_llm(messages, temperature=TEMPERATURE, max_tokens=2000)
-        
-        if not content:
-            raise ValueError("LLM returned empty response")
-        
-        # Extract JSON from response (handle markdown code blocks)
-        json_match = re.search(r'\[[\s\S]*\]', content)
-        if json_match:
-            json_str = json_match.group(0)
-        else:
-            json_str = content.strip()
-        
-        # Parse JSON
-        claims_data = json.loads(json_str)
-        
-        if not isinstance(claims_data, list):
-            raise ValueError("LLM did not return a list of claims")
-        
-        # Validate and clean claims
-        validated_claims = []
-        for i, claim_data in enumerate(claims_data[:MAX_CLAIMS]):
-            if not isinstance(claim_data, dict):
-                continue
-            
-            claim_text = claim_data.get("claim_text", "").strip()
-            if not claim_text or len(claim_text) < 10:
+
+def _recover_json_array(content: str) -> Optional[list]:
+    """Find a non-empty JSON array in a response that didn't parse as a whole"""
+    json_patterns = [
+        r'\[[\s\S]*?\]',  # JSON array
+        r'\{[\s\S]*?\}',  # JSON object
+    ]
+    for pattern in json_patterns:
+        matches = re.findall(pattern, content)
+        if matches:
+            try:
+                claims_data = json.loads(matches[0])
+                if isinstance(claims_data, list) and len(claims_data) > 0:
+                    logger.info(f"Successfully extracted JSON using pattern matching")
+                    return claims_data
+            except json.JSONDecodeError:
                 continue
-            
-            page_numbers = claim_data.get("page_numbers", [])
-            if not page_numbers:
-                # Try to infer from text if not provided
-                page_numbers = [1]
-            
-            claim_type = claim_data.get("claim_type", "other")
-            if claim_type not in ["accounting", "business_model", "fraud", "related_party", "guidance", "metrics", "other"]:
-                claim_type = "other"
-            
-            validated_claims.append({
-                "claim_text": claim_text,
-                "page_numbers": page_numbers if isinstance(page_numbers, list) else [page_numbers],
-                "claim_type": claim_type
-            })
-        
-        # Deduplicate claims
-        deduplicated = deduplicate_claims(validated_claims)
-        
-        # Ensure we have enough claims
-        if len(deduplicated) < MIN_CLAIMS:
-            logger.warning(f"Only extracted {len(deduplicated)} claims, minimum is {MIN_CLAIMS}")
-        
-        # Limit to MAX_CLAIMS
-        deduplicated = deduplicated[:MAX_CLAIMS]
-        
-        # Convert to Claim objects
-        claims = []
-        for i, claim_data in enumerate(deduplicated, start=1):
-            claim = Claim(
-                claim_id=generate_claim_id(i),
-                claim_text=claim_data["claim_text"],
-                page_numbers=claim_data["page_numbers"],
-                claim_type=claim_data["claim_type"]
-            )
-            claims.append(claim)
-        
-        logger.info(f"Successfully extracted {len(claims)} claims")
-        return claims
-        
+    return None
+
+
+def _parse_claims_response(content: str) -> List[Claim]:
+    """
+    Turn the LLM's response into validated, deduplicated Claim objects
+
+    Raises:
+        ValueError: If the response is empty or holds no usable JSON array
+    """
+    if not content:
+        raise ValueError("LLM returned empty response")
+    
+    # Extract JSON from response (handle markdown code blocks)
+    json_match = re.search(r'\[[\s\S]*\]', content)
+    if json_match:
+        json_str = json_match.group(0)
+    else:
+        json_str = content.strip()
+    
+    # Parse JSON
+    try:
+        claims_data = json.loads(json_str)
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON from LLM response: {e}")
         logger.error(f"LLM response (first 1000 chars): {content[:1000]}")
         # Try to extract JSON from response more aggressively
-        # Try to find JSON array in the response
-        json_patterns = [
-            r'\[[\s\S]*?\]',  # JSON array
-            r'\{[\s\S]*?\}',  # JSON object
-        ]
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content)
-            if matches:
-                try:
-                    claims_data = json.loads(matches[0])
-                    if isinstance(claims_data, list) and len(claims_data) > 0:
-                        logger.info(f"Successfully extracted JSON using pattern matching")
-                        # Continue with processing
-                        break
-                except:
-                    continue
-        else:
+        claims_data = _recover_json_array(content)
+        if claims_data is None:
             raise ValueError(f"LLM did not return valid JSON: {e}\nResponse: {content[:500]}")
-    except requests.exceptions.RequestException as e:
+    
+    if not isinstance(claims_data, list):
+        raise ValueError("LLM did not return a list of claims")
+    
+    # Validate and clean claims
+    validated_claims = []
+    for i, claim_data in enumerate(claims_data[:MAX_CLAIMS]):
+        if not isinstance(claim_data, dict):
+            continue
+        
+        claim_text = claim_data.get("claim_text", "").strip()
+        if not claim_text or len(claim_text) < 10:
+            continue
+        
+        page_numbers = claim_data.get("page_numbers", [])
+        if not page_numbers:
+            # Try to infer from text if not provided
+            page_numbers = [1]
+        
+        claim_type = claim_data.get("claim_type", "other")
+        if claim_type not in ["accounting", "business_model", "fraud", "related_party", "guidance", "metrics", "other"]:
+            claim_type = "other"
+        
+        validated_claims.append({
+            "claim_text": claim_text,
+            "page_numbers": page_numbers if isinstance(page_numbers, list) else [page_numbers],
+            "claim_type": claim_type
+        })
+    
+    # Deduplicate claims
+    deduplicated = deduplicate_claims(validated_claims)
+    
+    # Ensure we have enough claims
+    if len(deduplicated) < MIN_CLAIMS:
+        logger.warning(f"Only extracted {len(deduplicated)} claims, minimum is {MIN_CLAIMS}")
+    
+    # Limit to MAX_CLAIMS
+    deduplicated = deduplicated[:MAX_CLAIMS]
+    
+    # Convert to Claim objects
+    claims = []
+    for i, claim_data in enumerate(deduplicated, start=1):
+        claim = Claim(
+            claim_id=generate_claim_id(i),
+            claim_text=claim_data["claim_text"],
+            page_numbers=claim_data["page_numbers"],
+            claim_type=claim_data["claim_type"]
+        )
+        claims.append(claim)
+    
+    logger.info(f"Successfully extracted {len(claims)} claims")
+    return claims
+
+
+async def extract_claims_from_text(text: str, pages: List[tuple], client) -> List[Claim]:
+    """
+    Extract independent claims from report text using LLM
+
+    Args:
+        text: Full text of the report (first 10 pages)
+        pages: List of (page_number, page_text) tuples
+        client: Shared AsyncOpenAI client (see config.create_async_openai_client)
+
+    Returns:
+        List of Claim objects
+    """
+    logger.info("Extracting claims from report text using LLM")
+    messages = _build_extraction_messages(text, pages)
+
+    try:
+        logger.info(f"Calling OpenAI API with model: {LLM_MODEL}")
+        content = await call_llm(client, messages, temperature=TEMPERATURE, max_tokens=2000)
+        return _parse_claims_response(content)
+    except llm_connection_errors() as e:
         logger.error(f"Failed to call OpenAI API: {e}")
         raise ConnectionError(f"Failed to connect to OpenAI API: {e}")
     except Exception as e:
@@ -2,66 +2,143 @@
 Configuration module for the Short Report Rebuttal Assistant
 Loads environment variables and sets up paths
 """
+import functools
+import importlib.util
 import os
+import stat
 from pathlib import Path
 
-# Try to load environment variables from .env file
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    # dotenv not installed, use environment variables directly
-    pass
+
+@functools.cache
+def _init_dotenv() -> None:
+    """Load environment variables from .env file, at most once per process"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # dotenv not installed, use environment variables directly
+        pass
+
+
+# Production containers inject env vars directly and can skip reading .env entirely
+if os.environ.get("RAG_SKIP_DOTENV") != "1":
+    _init_dotenv()
 
 # Base directory - backend is in rag_demo/backend, so go up one level to rag_demo root
 # In Railway, Root Directory is set to 'backend', so the working directory is 'backend'
 # We need to detect this and adjust BASE_DIR accordingly
-
-# Start with the directory containing this config file
-_config_dir = Path(__file__).parent.parent  # backend/app -> backend
-BASE_DIR = _config_dir  # This is 'backend' directory
-
-# Check if we're in Railway with Root Directory = 'backend'
-# In this case, company directory should be at backend/company (we copied it there)
-# So BASE_DIR should stay as 'backend' directory
-if (BASE_DIR / 'company').exists():
-    # Company is in backend/company, so BASE_DIR = backend (current)
-    pass
-elif (BASE_DIR.parent / 'company').exists():
-    # Company is in parent directory, so BASE_DIR = parent (project root)
-    BASE_DIR = BASE_DIR.parent
-else:
-    # Try to find company directory
-    # Check if we're in a 'backend' subdirectory
-    if BASE_DIR.name == 'backend':
-        # Try parent directory
-        if (BASE_DIR.parent / 'company').exists():
-            BASE_DIR = BASE_DIR.parent
-        # Try relative path from current working directory
-        elif Path('../company').exists():
-            BASE_DIR = Path('../').resolve()
-        # Try absolute path from config file location
-        elif (Path(__file__).parent.parent.parent.parent / 'company').exists():
-            BASE_DIR = Path(__file__).parent.parent.parent.parent
+@functools.cache
+def _compute_base_dir() -> Path:
+    """
+    Locate the directory that contains 'company/'
+
+    RAG_BASE_DIR, if set, is used as-is with no filesystem probing. Otherwise the
+    candidates are stat()ed in order and the first one containing 'company' wins.
+    """
+    env_base = os.environ.get("RAG_BASE_DIR")
+    if env_base:
+        return Path(env_base).resolve()
+
+    # Start with the directory containing this config file
+    config_dir = Path(__file__).parent.parent  # backend/app -> backend
+
+    # backend/company (Railway with Root Directory = 'backend', company copied there),
+    # then the project root, then paths relative to the working directory / further up
+    candidates = [config_dir, config_dir.parent]
+    if config_dir.name == 'backend':
+        candidates += [Path('..').resolve(), config_dir.parent.parent]
+
+    for candidate in candidates:
+        try:
+            if stat.S_ISDIR(os.stat(candidate / 'company').st_mode):
+                return candidate
+        except OSError:
+            continue
+    return config_dir
+
+
+BASE_DIR = _compute_base_dir()
 
 # OpenAI configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-large")
-EMBED_DIMENSION = 3072  # text-embedding-3-large dimension
+# Judge routing: straightforward claims with plenty of evidence go to the small model
+LLM_MODEL_SMALL = os.getenv("LLM_MODEL_SMALL", "gpt-4o-mini")
+LLM_MODEL_LARGE = os.getenv("LLM_MODEL_LARGE", LLM_MODEL)
+# Opt-in: also send claims whose top evidence is highly similar and quotes the claim's
+# figures to the small model (the LLM still decides the verdict)
+JUDGE_RULE_ROUTING = os.getenv("JUDGE_RULE_ROUTING", "0") == "1"
+
+
+# Output dimension of each known OpenAI embedding model
+_MODEL_DIMS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+_DEFAULT_EMBED_DIMENSION = 3072  # Default for OpenAI
 
-# Initialize OpenAI client
-openai_client = None
+# EMBED_MODEL is fixed for the life of the process, so resolve its dimension once
+EMBED_DIMENSION = _MODEL_DIMS.get(EMBED_MODEL, _DEFAULT_EMBED_DIMENSION)
+
+LLM_MAX_RETRIES = 3
+LLM_TIMEOUT_SECONDS = 120.0
+
+# OpenAI client is created on first use so importing config doesn't pay for importing openai
 if not OPENAI_API_KEY:
     import warnings
     warnings.warn("OPENAI_API_KEY is not set. Please set OPENAI_API_KEY environment variable.")
-else:
+
+
+@functools.cache
+def get_openai_client():
+    """Return the shared OpenAI client, or None if no API key is set or openai is not installed"""
+    if not OPENAI_API_KEY:
+        return None
     try:
+        import httpx
         from openai import OpenAI
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
     except ImportError:
         import warnings
         warnings.warn("OpenAI package not installed. Please run: pip install openai")
+        return None
+    # Share one keep-alive connection pool across all calls (the indexer embeds from several threads).
+    # The SDK retries connection errors, 408/409/429 and 5xx itself with exponential backoff.
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        max_retries=LLM_MAX_RETRIES,
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60.0)
+        )
+    )
+
+
+def create_async_openai_client():
+    """
+    Create an AsyncOpenAI client, or None if no API key is set or openai is not installed
+
+    Unlike get_openai_client this is not cached: an async connection pool belongs to the
+    event loop that opened it, so the API server creates one in its lifespan and closes it
+    on shutdown. HTTP/2 (many requests over one connection) is used if h2 is installed.
+    """
+    if not OPENAI_API_KEY:
+        return None
+    try:
+        import httpx
+        from openai import AsyncOpenAI
+    except ImportError:
+        return None
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        max_retries=LLM_MAX_RETRIES,
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+        http_client=httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60.0)
+        )
+    )
 
 # Storage paths - relative to rag_demo root (one level up from backend)
 # Handle both relative and absolute paths from environment variables
@@ -80,12 +157,16 @@ CHROMA_DIR = _resolve_path("CHROMA_DIR", BASE_DIR / "storage" / "chroma")
 INTERNAL_DATA_DIR = _resolve_path("INTERNAL_DATA_DIR", BASE_DIR / "company" / "EDU")
 REPORTS_DIR = _resolve_path("REPORTS_DIR", BASE_DIR / "storage" / "reports")
 
-# Ensure directories exist
-CHROMA_DIR.mkdir(parents=True, exist_ok=True)
-REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-INTERNAL_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# Directories are created on first write rather than at import time
+@functools.cache
+def ensure_dir(path: Path) -> Path:
+    """Create a directory (and parents) if needed; cached so repeat calls skip the syscalls"""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
 # Processing configuration
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))  # 50MB
 MAX_PAGES = 3  # Only process first 3 pages
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 50
@@ -93,8 +174,14 @@ DEFAULT_TOP_K = 6
 MAX_CLAIMS = 30
 MIN_CLAIMS = 8
 
+# Judge prompt budget: evidence beyond these limits only adds prefill cost
+MAX_CITATIONS = 8  # Citations arrive sorted by similarity, so the top ones are kept
+PER_QUOTE_CHARS = 600
+MAX_PROMPT_TOKENS = 4000
+
 # LLM configuration
 TEMPERATURE = 0.3  # Lower temperature for more deterministic output
+JUDGE_MAX_TOKENS = 800  # The judge's JSON (coverage, confidence, 5-10 bullets, short lists) fits well within this
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -103,12 +190,7 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 # Embedding dimension tracking
 def get_expected_embedding_dimension() -> int:
     """Get the expected embedding dimension for OpenAI models"""
-    if "3-large" in EMBED_MODEL:
-        return 3072
-    elif "3-small" in EMBED_MODEL:
-        return 1536
-    else:
-        return 3072  # Default for OpenAI
+    return EMBED_DIMENSION
 
 
 def is_embedding_dimension_mismatch(stored_dimension: int) -> bool:
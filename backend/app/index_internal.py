@@ -1,23 +1,47 @@
 """
 Internal document indexing module: Load, chunk, embed, and index internal documents
 """
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import os
+import shelve
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 
-import chromadb
-from chromadb.config import Settings
+import numpy as np
 
 from app.config import (
     INTERNAL_DATA_DIR, CHROMA_DIR, EMBED_MODEL,
-    CHUNK_SIZE, CHUNK_OVERLAP, openai_client, EMBED_DIMENSION,
-    is_embedding_dimension_mismatch, get_dimension_change_info, OPENAI_API_KEY
+    CHUNK_SIZE, CHUNK_OVERLAP, get_openai_client, EMBED_DIMENSION,
+    is_embedding_dimension_mismatch, get_dimension_change_info, OPENAI_API_KEY,
+    ensure_dir
 )
+from app.judge_cache import clear_judge_cache
 from app.utils import chunk_text, logger
-import shutil
 
 logger = logging.getLogger(__name__)
 
+# Embedding requests are network-bound, so a handful of threads overlaps their round-trips
+EMBED_MAX_WORKERS = 8
+
+# TXT/MD files above this size are chunked straight from disk instead of being read whole
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+STREAM_WINDOW_CHARS = 64 * 1024
+
+# Sidecar recording the embedding setup of the indexed collection, so the
+# dimension check can usually skip opening Chroma entirely
+_META_PATH = CHROMA_DIR / "_embed_meta.json"
+
+# Index generation this process's ChromaDB systems were opened against (see sync_chroma_generation)
+_chroma_generation: Optional[int] = None
+_chroma_generation_lock = threading.Lock()
+
 
 def get_embedding(text: str) -> List[float]:
     """
@@ -30,6 +54,7 @@ def get_embedding(text: str) -> List[float]:
         Embedding vector
     """
     try:
+        openai_client = get_openai_client()
         if not openai_client:
             raise ConnectionError("OpenAI client not initialized. Please set OPENAI_API_KEY.")
 
@@ -49,6 +74,158 @@ def get_embedding(text: str) -> List[float]:
         raise ConnectionError(f"Failed to get embeddings from OpenAI: {e}")
 
 
+def get_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings for a batch of texts in a single OpenAI request
+
+    Args:
+        texts: Texts to embed
+
+    Returns:
+        Embedding vectors, in the same order as texts
+    """
+    try:
+        openai_client = get_openai_client()
+        if not openai_client:
+            raise ConnectionError("OpenAI client not initialized. Please set OPENAI_API_KEY.")
+
+        response = openai_client.embeddings.create(
+            model=EMBED_MODEL,
+            input=texts
+        )
+        # The API returns one item per input; sort by index to be safe about ordering
+        embeddings = [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+        if len(embeddings) != len(texts) or not all(embeddings):
+            raise ValueError(f"OpenAI returned {len(embeddings)} embeddings for {len(texts)} inputs")
+
+        return embeddings
+
+    except Exception as e:
+        logger.error(f"Failed to get batch embeddings: {e}")
+        raise ConnectionError(f"Failed to get embeddings from OpenAI: {e}")
+
+
+def _embed_cache_key(text: str) -> str:
+    """Content-addressed cache key; includes the model so switching EMBED_MODEL never reuses stale vectors"""
+    return hashlib.blake2b(f"{EMBED_MODEL}:{text}".encode(), digest_size=16).hexdigest()
+
+
+def embed_chunks(chunks: List[str], batch_size: int = 100) -> np.ndarray:
+    """
+    Embed chunks, reusing vectors from the on-disk embedding cache where possible
+
+    Duplicate chunks are embedded once. Cache misses are embedded in concurrent
+    batches and written back to the cache.
+    Batches that still fail after the OpenAI client's retries get zero vectors (and are not cached).
+
+    Args:
+        chunks: Chunk texts to embed
+        batch_size: Number of chunks per embeddings request
+
+    Returns:
+        float32 array of shape (len(chunks), EMBED_DIMENSION), rows in the same order as chunks
+    """
+    # Identical chunks (repeated headers/footers) are embedded once and share a vector
+    unique = {}
+    positions = [unique.setdefault(chunk, len(unique)) for chunk in chunks]
+    if len(unique) < len(chunks):
+        logger.info(f"Deduplicated {len(chunks)} chunks to {len(unique)} unique chunks")
+    chunks = list(unique)
+
+    # float32 rows are what Chroma stores, at half the size of a list of Python floats
+    embeddings = np.empty((len(chunks), EMBED_DIMENSION), dtype=np.float32)
+
+    cache = shelve.open(str(CHROMA_DIR / "embed_cache.db"))
+    try:
+        keys = [_embed_cache_key(chunk) for chunk in chunks]
+        misses = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                embeddings[i] = cached
+        logger.info(f"Embedding cache: {len(chunks) - len(misses)} hits, {len(misses)} misses")
+
+        batches = [misses[i:i+batch_size] for i in range(0, len(misses), batch_size)]
+
+        # Submit all batches concurrently; the cache is only touched from this thread
+        with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+            futures = [executor.submit(get_embeddings_batch, [chunks[i] for i in batch]) for batch in batches]
+
+            for n, (future, batch) in enumerate(zip(futures, batches), start=1):
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to embed batch {n}/{len(batches)}: {e}")
+                    # Use zero vectors as fallback (not ideal, but allows processing to continue)
+                    embeddings[batch] = 0.0
+                    continue
+
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+                    cache[keys[i]] = embeddings[i].copy()
+                logger.info(f"Embedded batch {n}/{len(batches)}")
+
+        return embeddings[positions]
+    finally:
+        cache.close()
+
+
+def _write_embed_meta() -> None:
+    """Record the current embedding model/dimension next to the Chroma store"""
+    try:
+        _META_PATH.write_text(json.dumps({"dim": EMBED_DIMENSION, "model": EMBED_MODEL}), encoding='utf-8')
+    except OSError as e:
+        logger.warning(f"Failed to write embedding metadata sidecar: {e}")
+
+
+def index_generation() -> int:
+    """
+    Stamp that changes whenever the collection is (re)indexed, for invalidating caches
+    of retrieval results in every process
+
+    The embedding sidecar is rewritten at the end of each indexing run and moves away
+    with the old store on a dimension rebuild, so its mtime serves; 0 if absent.
+    """
+    try:
+        return os.stat(_META_PATH).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def sync_chroma_generation() -> int:
+    """
+    Drop this process's cached ChromaDB systems if the index was rebuilt since the last call
+
+    PersistentClient reuses one System per path for the life of the process, so after
+    another worker re-indexes (a dimension rebuild even moves the old store away) new
+    clients would keep using the stale one. Clients opened before a change must be
+    reopened by their owner; queries still running on them may fail.
+
+    Returns:
+        The current index generation (see index_generation)
+    """
+    global _chroma_generation
+    generation = index_generation()
+    with _chroma_generation_lock:
+        if _chroma_generation is not None and generation != _chroma_generation:
+            from chromadb.api.client import SharedSystemClient
+
+            logger.info("Index changed, reopening ChromaDB")
+            SharedSystemClient.clear_system_cache()
+        _chroma_generation = generation
+    return generation
+
+
+def _invalidate_chroma_generation() -> None:
+    """Make the next sync_chroma_generation in this process drop the cached ChromaDB systems"""
+    global _chroma_generation
+    with _chroma_generation_lock:
+        _chroma_generation = -1
+
+
 def check_and_handle_dimension_mismatch():
     """
     Check if existing ChromaDB collection has mismatched embedding dimensions.
@@ -57,7 +234,19 @@ def check_and_handle_dimension_mismatch():
     Returns:
         tuple: (dimension_mismatch: bool, old_dimension: int or None, message: str)
     """
+    # Fast path: the sidecar written at index time confirms the dimension without opening Chroma
     try:
+        meta = json.loads(_META_PATH.read_text(encoding='utf-8'))
+        if meta.get("dim") == EMBED_DIMENSION:
+            logger.info(f"Collection embedding dimension matches current configuration ({EMBED_DIMENSION}D, from sidecar)")
+            return False, None, "Dimension match confirmed (sidecar)"
+    except (OSError, ValueError):
+        pass
+
+    try:
+        import chromadb
+        from chromadb.config import Settings
+
         client = chromadb.PersistentClient(
             path=str(CHROMA_DIR),
             settings=Settings(anonymized_telemetry=False)
@@ -83,21 +272,27 @@ def check_and_handle_dimension_mismatch():
             logger.warning(f"DIMENSION MISMATCH DETECTED: {message}")
             logger.warning(f"Backing up and removing collection for re-indexing...")
 
-            # Backup the chroma directory
-            backup_dir = CHROMA_DIR.parent / f"chroma_backup_{EMBED_DIMENSION}d"
-            if CHROMA_DIR.exists():
-                if backup_dir.exists():
-                    shutil.rmtree(backup_dir)
-                shutil.copytree(CHROMA_DIR, backup_dir)
-                logger.info(f"Backed up old collection to: {backup_dir}")
+            # Back up by moving the whole store aside: a rename is O(1) on the same filesystem,
+            # and leaves CHROMA_DIR empty so the collection is recreated with the new dimension.
+            # The process-wide Chroma system behind this client may also be serving the app's
+            # shared client, so it is not stopped here; the generation is invalidated instead
+            # and the next sync_chroma_generation (before indexing reopens the store) drops it.
+            del collection
+            del client
 
-            # Delete the collection
-            client.delete_collection("internal_documents")
-            logger.info("Deleted incompatible collection. New collection will be created with correct dimensions.")
+            backup_dir = CHROMA_DIR.parent / f"chroma_backup_{EMBED_DIMENSION}d"
+            if backup_dir.exists():
+                shutil.rmtree(backup_dir)
+            os.replace(str(CHROMA_DIR), str(backup_dir))
+            CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+            _invalidate_chroma_generation()
+            logger.info(f"Moved old collection to backup: {backup_dir}")
+            logger.info("New collection will be created with correct dimensions.")
 
             return True, int(stored_dimension), message
         else:
             logger.info(f"Collection embedding dimension matches current configuration ({EMBED_DIMENSION}D)")
+            _write_embed_meta()
             return False, None, "Dimension match confirmed"
 
     except Exception as e:
@@ -105,110 +300,192 @@ def check_and_handle_dimension_mismatch():
         return False, None, f"Could not verify (error: {str(e)[:50]})"
 
 
+@functools.lru_cache(maxsize=256)
+def _scandir_cached(path: str) -> Tuple[os.DirEntry, ...]:
+    """List a directory once per indexing run; DirEntry also caches its file-type lookups"""
+    with os.scandir(path) as entries:
+        return tuple(entries)
+
+
+def _walk_files(root: Path) -> Iterator[os.DirEntry]:
+    """Yield an entry for every regular file under root (depth-first, symlinked directories not followed)"""
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = _scandir_cached(current)
+        except OSError as e:
+            logger.warning(f"Failed to list directory {current}: {e}")
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+def _read_pdf(file_path: Path) -> str:
+    """Read all pages of a PDF as text"""
+    from app.pdf_extract import extract_full_text
+    return extract_full_text(file_path, max_pages=1000)  # Load all pages for internal docs
+
+
+def _read_text(file_path: Path) -> str:
+    """Read a TXT/MD file as UTF-8"""
+    return file_path.read_text(encoding='utf-8')
+
+
+def _read_docx(file_path: Path) -> Optional[str]:
+    """Read paragraph text from a DOCX file, or None if python-docx is missing or the file is unreadable"""
+    try:
+        from docx import Document
+    except ImportError:
+        logger.warning(f"python-docx not installed, skipping {file_path}")
+        return None
+    try:
+        doc = Document(file_path)
+        return '\n'.join(para.text for para in doc.paragraphs)
+    except Exception as e:
+        logger.warning(f"Failed to read DOCX {file_path}: {e}")
+        return None
+
+
+# Reader for each supported file extension
+_READERS = {
+    '.pdf': _read_pdf,
+    '.txt': _read_text,
+    '.md': _read_text,
+    '.docx': _read_docx,
+}
+
+
+def _stream_chunks(file_path: Path, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """
+    Chunk a large text file while reading it in fixed-size windows
+
+    Uses the same sentence-boundary rule as chunk_text, but only ever holds one
+    window plus one chunk of text in memory.
+    """
+    buffer = ""
+    # Decoding happens lazily mid-index, where an exception would abort the whole run
+    # after some batches were already added; undecodable bytes become U+FFFD instead
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        while True:
+            window = f.read(STREAM_WINDOW_CHARS)
+            if not window:
+                break
+            buffer += window
+            while len(buffer) > chunk_size:
+                chunk = buffer[:chunk_size]
+                end = chunk_size
+                # Try to break at sentence boundary
+                break_point = max(chunk.rfind('.'), chunk.rfind('\n'))
+                if break_point > chunk_size * 0.5:
+                    chunk = chunk[:break_point + 1]
+                    end = break_point + 1
+                yield chunk.strip()
+                buffer = buffer[end - chunk_overlap:]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _document_chunks(doc: Dict) -> Iterable[str]:
+    """Chunk a loaded document, streaming from disk if it was too large to load"""
+    if doc['text'] is None:
+        return _stream_chunks(Path(doc['doc_path']))
+    return chunk_text(doc['text'], chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+
+def _chunk_stream(documents: List[Dict]) -> Iterator[Tuple[str, str, Dict]]:
+    """Yield (chunk_id, chunk, metadata) for every chunk of every document, one at a time"""
+    for doc in documents:
+        count = 0
+        for i, chunk in enumerate(_document_chunks(doc)):
+            chunk_id = f"{doc['doc_id']}_chunk_{i}"
+            yield chunk_id, chunk, {
+                'doc_id': doc['doc_id'],
+                'doc_title': doc['doc_title'],
+                'doc_path': doc['doc_path'],
+                'chunk_id': chunk_id,
+                'chunk_index': i
+            }
+            count += 1
+        logger.info(f"Chunked {doc['doc_title']} into {count} chunks")
+
+
 def load_documents(data_dir: Path) -> List[Dict[str, str]]:
     """
-    Load documents from data directory (PDF, TXT, MD, DOCX)
+    Load documents from data directory and its subdirectories (PDF, TXT, MD, DOCX)
     
     Args:
         data_dir: Directory containing internal documents
     
     Returns:
-        List of documents with metadata
+        List of documents with metadata. Large TXT/MD files have 'text' set to None
+        and are chunked from disk at index time.
     """
     documents = []
     
-    # Supported file extensions
-    extensions = {'.pdf', '.txt', '.md', '.docx'}
-    
     if not data_dir.exists():
         logger.warning(f"Data directory does not exist: {data_dir}")
         return documents
     
-    # First try direct files in the directory
-    for file_path in data_dir.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            try:
-                if file_path.suffix.lower() == '.pdf':
-                    from app.pdf_extract import extract_full_text
-                    text = extract_full_text(file_path, max_pages=1000)  # Load all pages for internal docs
-                elif file_path.suffix.lower() in ['.txt', '.md']:
-                    text = file_path.read_text(encoding='utf-8')
-                elif file_path.suffix.lower() == '.docx':
-                    try:
-                        from docx import Document
-                        doc = Document(file_path)
-                        text = '\n'.join([para.text for para in doc.paragraphs])
-                    except ImportError:
-                        logger.warning(f"python-docx not installed, skipping {file_path}")
-                        continue
-                    except Exception as e:
-                        logger.warning(f"Failed to read DOCX {file_path}: {e}")
-                        continue
-                else:
-                    continue
-                
-                if text.strip():
+    # Single walk over the directory tree; the set guards against visiting a path twice
+    seen = set()
+    for entry in _walk_files(data_dir):
+        key = entry.path
+        if key in seen:
+            continue
+        seen.add(key)
+        
+        file_path = Path(key)
+        reader = _READERS.get(file_path.suffix.lower())
+        if reader is None:
+            continue
+        
+        try:
+            if reader is _read_text:
+                # DirEntry caches the stat result, so this is at most one syscall per file
+                size = entry.stat().st_size
+                if size > STREAM_THRESHOLD_BYTES:
+                    # Too large to hold in memory; chunked from disk at index time
                     documents.append({
                         'doc_id': file_path.stem,
                         'doc_title': file_path.name,
-                        'doc_path': str(file_path),
-                        'text': text
+                        'doc_path': key,
+                        'text': None,
+                        'size': size
                     })
-                    logger.info(f"Loaded document: {file_path.name} ({len(text)} chars)")
-                    
-            except ImportError as import_err:
-                error_msg = str(import_err)
-                if "pypdf" in error_msg.lower() or "pdfplumber" in error_msg.lower():
-                    logger.error(f"PDF library not installed. Please install: pip install pypdf pdfplumber")
-                    logger.error(f"Or install all dependencies: pip install -r requirements.txt")
-                else:
-                    logger.error(f"Missing required library for {file_path}: {import_err}")
-                    logger.error("Please install required dependencies: pip install -r requirements.txt")
-                raise
-            except Exception as e:
-                logger.error(f"Failed to load {file_path}: {e}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                # Don't raise here, continue with other files
-                continue
-    
-    # Also try rglob for subdirectories
-    for file_path in data_dir.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            # Skip if already processed
-            if any(doc['doc_path'] == str(file_path) for doc in documents):
-                continue
-            try:
-                if file_path.suffix.lower() == '.pdf':
-                    from app.pdf_extract import extract_full_text
-                    text = extract_full_text(file_path, max_pages=1000)  # Load all pages for internal docs
-                elif file_path.suffix.lower() in ['.txt', '.md']:
-                    text = file_path.read_text(encoding='utf-8')
-                elif file_path.suffix.lower() == '.docx':
-                    try:
-                        from docx import Document
-                        doc = Document(file_path)
-                        text = '\n'.join([para.text for para in doc.paragraphs])
-                    except ImportError:
-                        logger.warning(f"python-docx not installed, skipping {file_path}")
-                        continue
-                    except Exception as e:
-                        logger.warning(f"Failed to read DOCX {file_path}: {e}")
-                        continue
-                else:
+                    logger.info(f"Found large document: {file_path.name} ({size} bytes, will be streamed)")
                     continue
+            
+            text = reader(file_path)
+            
+            if text and text.strip():
+                documents.append({
+                    'doc_id': file_path.stem,
+                    'doc_title': file_path.name,
+                    'doc_path': key,
+                    'text': text,
+                    'size': len(text)
+                })
+                logger.info(f"Loaded document: {file_path.name} ({len(text)} chars)")
                 
-                if text.strip():
-                    documents.append({
-                        'doc_id': file_path.stem,
-                        'doc_title': file_path.name,
-                        'doc_path': str(file_path),
-                        'text': text
-                    })
-                    logger.info(f"Loaded document: {file_path.name} ({len(text)} chars)")
-                    
-            except Exception as e:
-                logger.error(f"Failed to load {file_path}: {e}")
+        except ImportError as import_err:
+            error_msg = str(import_err)
+            if "pypdf" in error_msg.lower() or "pdfplumber" in error_msg.lower():
+                logger.error(f"PDF library not installed. Please install: pip install pypdf pdfplumber")
+                logger.error(f"Or install all dependencies: pip install -r requirements.txt")
+            else:
+                logger.error(f"Missing required library for {file_path}: {import_err}")
+                logger.error("Please install required dependencies: pip install -r requirements.txt")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load {file_path}: {e}")
+            import traceback
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            # Don't raise here, continue with other files
+            continue
     
     return documents
 
@@ -218,11 +495,15 @@ def index_internal_documents():
     Main function to index all internal documents
     Processes company/EDU/company_data.pdf and stores in vector DB
     """
+    # Directory listings are only cached for the duration of one indexing run
+    _scandir_cached.cache_clear()
+    ensure_dir(CHROMA_DIR)
+
     logger.info("=" * 80)
     logger.info("Starting internal document indexing")
     logger.info("=" * 80)
     logger.info(f"Using OpenAI for embeddings")
-    logger.info(f"openai_client is None: {openai_client is None}")
+    logger.info(f"openai_client is None: {get_openai_client() is None}")
     logger.info(f"OPENAI_API_KEY set: {bool(OPENAI_API_KEY)}")
     logger.info(f"Embedding Model: {EMBED_MODEL}")
     logger.info(f"Embedding Dimension: {EMBED_DIMENSION}")
@@ -236,34 +517,33 @@ def index_internal_documents():
     else:
         logger.info(f"Dimension check: {mismatch_msg}")
 
-    # INTERNAL_DATA_DIR is already resolved in config.py, but ensure it's absolute
+    # INTERNAL_DATA_DIR is already resolved in config.py, but ensure it's absolute (resolved once, reused below)
     internal_dir = Path(INTERNAL_DATA_DIR).resolve()
+    internal_dir_exists = os.path.isdir(internal_dir)
     logger.info(f"INTERNAL_DATA_DIR from config: {INTERNAL_DATA_DIR}")
     logger.info(f"Absolute path: {internal_dir}")
-    logger.info(f"Path exists: {internal_dir.exists()}")
+    logger.info(f"Path exists: {internal_dir_exists}")
     logger.info(f"Current working directory: {Path.cwd()}")
     logger.info(f"Config file location: {Path(__file__)}")
     
-    # Ensure we use resolved absolute path
-    internal_dir = Path(INTERNAL_DATA_DIR).resolve()
-    
     # Verify directory exists
-    if not internal_dir.exists():
+    if not internal_dir_exists:
         logger.error(f"Directory does not exist: {internal_dir}")
         # Try to find the correct path
         possible_paths = [
             Path(__file__).parent.parent / "company" / "EDU",  # backend/company/EDU (Railway with Root Directory = backend)
             Path(__file__).parent.parent.parent / "company" / "EDU",  # From rag_demo root
             Path(__file__).parent.parent.parent.parent / "company" / "EDU",  # Alternative
-            Path("company/EDU").resolve(),  # Relative to current working directory
-            Path("../company/EDU").resolve(),  # One level up
+            Path("company/EDU"),  # Relative to current working directory
+            Path("../company/EDU"),  # One level up
         ]
         for possible in possible_paths:
-            resolved_possible = possible.resolve()
-            logger.info(f"Checking possible path: {resolved_possible} (exists: {resolved_possible.exists()})")
-            if resolved_possible.exists():
-                logger.warning(f"Found directory at: {resolved_possible}")
-                internal_dir = resolved_possible
+            # One isdir() stat per candidate; only resolve the one we actually use
+            exists = os.path.isdir(possible)
+            logger.info(f"Checking possible path: {possible} (exists: {exists})")
+            if exists:
+                internal_dir = possible.resolve()
+                logger.warning(f"Found directory at: {internal_dir}")
                 break
         else:
             raise FileNotFoundError(f"Internal data directory not found: {internal_dir}")
@@ -277,20 +557,24 @@ def index_internal_documents():
         logger.warning(f"Expected file: {internal_dir / 'company_data.pdf'}")
         # List actual files in directory
         if internal_dir.exists():
-            actual_files = list(internal_dir.glob('*'))
-            logger.warning(f"Actual files in directory: {[f.name for f in actual_files]}")
+            actual_files = [entry.name for entry in _scandir_cached(str(internal_dir))]
+            logger.warning(f"Actual files in directory: {actual_files}")
             # Check if PDF extraction failed
-            pdf_files = list(internal_dir.glob('*.pdf'))
-            if pdf_files:
+            if any(name.lower().endswith('.pdf') for name in actual_files):
                 logger.error(f"PDF files found but extraction failed. Check if PDF libraries are installed:")
                 logger.error(f"  pip install pypdf pdfplumber")
         raise ValueError(f"No documents found in {internal_dir}. Please check if PDF libraries are installed: pip install pypdf pdfplumber")
     
     logger.info(f"Found {len(documents)} document(s) to index:")
     for doc in documents:
-        logger.info(f"  - {doc['doc_title']} ({len(doc['text'])} characters)")
+        logger.info(f"  - {doc['doc_title']} ({doc['size']} {'bytes' if doc['text'] is None else 'characters'})")
     
     # Initialize ChromaDB
+    import chromadb
+    from chromadb.config import Settings
+
+    # A rebuild (here or in another worker) leaves this process's Chroma system pointing at the old store
+    sync_chroma_generation()
     client = chromadb.PersistentClient(
         path=str(CHROMA_DIR),
         settings=Settings(anonymized_telemetry=False)
@@ -303,7 +587,9 @@ def index_internal_documents():
             "description": "Internal company documents for rebuttal",
             "embedding_dimension": EMBED_DIMENSION,
             "embedding_model": EMBED_MODEL,
-            "llm_provider": "openai"
+            "llm_provider": "openai",
+            # Distances are then 1 - cosine similarity (Chroma defaults to squared L2)
+            "hnsw:space": "cosine"
         }
     )
 
@@ -313,52 +599,23 @@ def index_internal_documents():
         logger.info(f"Collection metadata: {collection.metadata}")
         return
     
-    # Process each document
-    all_chunks = []
-    all_metadatas = []
-    all_ids = []
-    
-    for doc in documents:
-        # Chunk the document
-        chunks = chunk_text(doc['text'], chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
-        
-        logger.info(f"Chunked {doc['doc_title']} into {len(chunks)} chunks")
-        
-        # Create embeddings and metadata for each chunk
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{doc['doc_id']}_chunk_{i}"
-            
-            all_chunks.append(chunk)
-            all_metadatas.append({
-                'doc_id': doc['doc_id'],
-                'doc_title': doc['doc_title'],
-                'doc_path': doc['doc_path'],
-                'chunk_id': chunk_id,
-                'chunk_index': i
-            })
-            all_ids.append(chunk_id)
-    
-    # Batch embed and add to collection
-    logger.info(f"Generating embeddings for {len(all_chunks)} chunks...")
-    batch_size = 10
+    # Chunk -> embed -> add one batch at a time, so only a single batch of chunks
+    # and vectors is ever held in memory. Each add() is its own SQLite transaction,
+    # so batches are large (Chroma rejects a single add() above client.get_max_batch_size()).
+    add_batch_size = 500
+    chunk_stream = _chunk_stream(documents)
+    batch_num = 0
     
-    for i in range(0, len(all_chunks), batch_size):
-        batch_chunks = all_chunks[i:i+batch_size]
-        batch_ids = all_ids[i:i+batch_size]
-        batch_metadatas = all_metadatas[i:i+batch_size]
+    while True:
+        batch = list(itertools.islice(chunk_stream, add_batch_size))
+        if not batch:
+            break
+        batch_num += 1
+        batch_ids, batch_chunks, batch_metadatas = (list(column) for column in zip(*batch))
         
-        # Get embeddings
-        embeddings = []
-        for chunk in batch_chunks:
-            try:
-                embedding = get_embedding(chunk)
-                embeddings.append(embedding)
-            except Exception as e:
-                logger.error(f"Failed to embed chunk {batch_ids[len(embeddings)]}: {e}")
-                # Use zero vector as fallback (not ideal, but allows processing to continue)
-                embeddings.append([0.0] * EMBED_DIMENSION)
+        # OpenAI accepts up to 2048 inputs per request; 100 chunks of CHUNK_SIZE chars stays well under the token limit
+        embeddings = embed_chunks(batch_chunks, batch_size=100)
         
-        # Add to collection
         collection.add(
             ids=batch_ids,
             embeddings=embeddings,
@@ -366,8 +623,11 @@ def index_internal_documents():
             metadatas=batch_metadatas
         )
         
-        logger.info(f"Indexed batch {i//batch_size + 1}/{(len(all_chunks) + batch_size - 1)//batch_size}")
+        logger.info(f"Indexed batch {batch_num} ({len(batch)} chunks)")
     
+    _write_embed_meta()
+    # Stored judgments were made against the previous index's evidence
+    clear_judge_cache()
     logger.info(f"Successfully indexed {collection.count()} chunks from {len(documents)} documents")
     logger.info(f"ChromaDB collection saved to {CHROMA_DIR}")
 
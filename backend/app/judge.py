@@ -1,18 +1,56 @@
 """
 Judge module: Evaluate whether a claim is fully/partially/not addressed by evidence
 """
+import asyncio
+import functools
+import io
 import logging
 import json
 import re
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 
-from app.config import LLM_MODEL, TEMPERATURE
-from app.claim_extract import call_llm
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+from app.config import (
+    LLM_MODEL, LLM_MODEL_SMALL, LLM_MODEL_LARGE, JUDGE_RULE_ROUTING, TEMPERATURE, JUDGE_MAX_TOKENS,
+    MAX_CITATIONS, PER_QUOTE_CHARS, MAX_PROMPT_TOKENS
+)
+from app.claim_extract import call_llm, call_llm_stream, llm_connection_errors
+from app.judge_cache import get_cached_analysis, store_analysis
 from app.models import Claim, ClaimAnalysis, Citation
 from app.utils import logger
 
 logger = logging.getLogger(__name__)
 
+# Claim types whose evidence is mostly figures/statements to check; the nuanced ones
+# (accounting, fraud, related party, ...) always go to the large model
+SIMPLE_CLAIM_TYPES = {"metrics", "guidance"}
+SMALL_MODEL_MIN_CITATIONS = 3
+
+# Claims judged at once by judge_claims_batch (each is an LLM call)
+JUDGE_BATCH_CONCURRENCY = 8
+
+# Rule-based routing (JUDGE_RULE_ROUTING): this many top citations at or above this cosine
+# similarity, sharing a figure with the claim, make the claim easy enough for the small model.
+# Matching figures don't say whether the evidence rebuts or confirms the claim, so the
+# verdict is always left to the LLM.
+RULE_MIN_CITATIONS = 2
+RULE_MIN_SIMILARITY = 0.85
+
+# Numeric tokens such as 40%, 1,234.5 or 17
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)*%?')
+_YEAR_RE = re.compile(r'(?:19|20)\d\d')
+
 
 JUDGMENT_CRITERIA = """
 ## Judgment Criteria
@@ -50,16 +88,263 @@ JUDGMENT_CRITERIA = """
 """
 
 
-def judge_claim(claim: Claim, citations: List[Citation]) -> ClaimAnalysis:
+# Everything that is identical across judge calls lives in these two constants, so every
+# request starts with a byte-identical prefix that the provider's prompt cache can reuse.
+# Nothing dynamic (claim text, IDs, citations, timestamps) may be added to them.
+_STATIC_SYSTEM = "You are a professional financial analyst skilled at evaluating evidence quality. Always return valid JSON format."
+
+_STATIC_CRITERIA_BLOCK = f"""You are a professional financial analyst responsible for evaluating whether short report claims are sufficiently rebutted by internal evidence.
+
+{JUDGMENT_CRITERIA}
+
+## Task:
+Based on the judgment criteria, evaluate the claim below against the retrieved evidence and return results in JSON format.
+
+Output Format (JSON):
+{{
+  "coverage": "fully_addressed" | "partially_addressed" | "not_addressed",
+  "confidence": integer 0-100,
+  "reasoning": "5-10 bullet points of analysis based on evidence",
+  "gaps": ["missing evidence type 1", "missing evidence type 2"] (if not fully addressed),
+  "recommended_actions": ["recommended action 1", "recommended action 2"]
+}}
+
+Emit the fields in exactly this order (coverage first).
+
+Important Notes:
+- Must strictly follow judgment criteria
+- If evidence is weak or not relevant, must classify as "not_addressed"
+- Must cite all evidence pieces used (mention explicitly in reasoning)
+- reasoning must contain 5-10 bullet points
+- If coverage is not "fully_addressed", must provide gaps and recommended_actions
+
+Return ONLY valid JSON, do not include other text."""
+
+# Full user prompt; the static block's literal braces are escaped so only the
+# per-claim placeholders below are substituted
+_PROMPT_TMPL = _STATIC_CRITERIA_BLOCK.replace("{", "{{").replace("}", "}}") + """
+
+## Claim:
+ID: {claim_id}
+Type: {claim_type}
+Content: {claim_text}
+Page Numbers: {page_numbers}
+
+## Retrieved Evidence:
+{citations_text}"""
+
+
+def _claim_keywords(claim_text: str) -> List[str]:
+    """Distinctive words of a claim (short stop-word-like tokens are skipped)"""
+    return [w for w in re.findall(r'\w+', claim_text.lower()) if len(w) >= 4 or w.isdigit()]
+
+
+def _truncate_quote(quote: str, keywords: List[str], limit: int = PER_QUOTE_CHARS) -> str:
     """
-    Judge whether a claim is fully/partially/not addressed by the evidence
-    
+    Shorten a quote to at most limit characters
+
+    The window is centred on the first claim keyword found in the quote, so the part
+    of the evidence that actually mentions the claim survives; without a match the
+    start of the quote is kept.
+    """
+    if len(quote) <= limit:
+        return quote
+
+    lowered = quote.lower()
+    hits = [pos for pos in (lowered.find(k) for k in keywords) if pos != -1]
+    center = min(hits) if hits else 0
+    start = max(0, min(center - limit // 2, len(quote) - limit))
+    end = start + limit
+    return ("..." if start > 0 else "") + quote[start:end] + ("..." if end < len(quote) else "")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding for LLM_MODEL, or None if unavailable"""
+    if not HAS_TIKTOKEN:
+        return None
+    # Encodings are downloaded on first use; don't fail judging if that is impossible.
+    # Every path returns (rather than raises), so lru_cache resolves this only once.
+    try:
+        try:
+            return tiktoken.encoding_for_model(LLM_MODEL)
+        except KeyError:
+            # Model unknown to this tiktoken version
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, prompt token cap disabled: {e}")
+        return None
+
+
+def _format_citation(i: int, cit: Citation, quote: str) -> str:
+    return (
+        f"[Evidence {i+1}]\n"
+        f"Document: {cit.doc_title}\n"
+        f"Chunk ID: {cit.chunk_id}\n"
+        f"Quote: {quote}\n"
+    )
+
+
+def _build_citations_text(claim: Claim, citations: List[Citation], base_tokens: int = 0) -> str:
+    """
+    Format citations for the judge prompt within the prompt budget
+
+    Keeps the top MAX_CITATIONS, trims each quote to PER_QUOTE_CHARS around the claim's
+    keywords and, when tiktoken is available, drops trailing (lowest-ranked) evidence
+    until the prompt fits in MAX_PROMPT_TOKENS minus the output reservation.
+
     Args:
-        claim: The claim to judge
-        citations: Retrieved evidence citations
-    
+        claim: The claim being judged (its words pick the quote windows)
+        citations: Retrieved citations, best first
+        base_tokens: Tokens already used by the rest of the prompt
+    """
+    keywords = _claim_keywords(claim.claim_text)
+    encoding = _get_encoding()
+    budget = MAX_PROMPT_TOKENS - JUDGE_MAX_TOKENS - base_tokens
+    used = 0
+
+    # Written straight into one buffer: no per-citation list to build and join afterwards
+    buf = io.StringIO()
+    kept = citations[:MAX_CITATIONS]
+    for i, cit in enumerate(kept):
+        block = _format_citation(i, cit, _truncate_quote(cit.quote, keywords))
+        if encoding is not None:
+            used += len(encoding.encode(block))
+            # Always keep the best piece of evidence
+            if used > budget and i > 0:
+                logger.info(f"Prompt budget reached, dropping {len(kept) - i} lowest-ranked citations")
+                break
+        if i > 0:
+            buf.write("\n\n")
+        buf.write(block)
+
+    return buf.getvalue()
+
+
+def _loads_json(text: str):
+    """Parse JSON with orjson when available, falling back to the stdlib parser"""
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # stdlib is more lenient (e.g. NaN/Infinity), so give it a chance before failing
+            pass
+    return json.loads(text)
+
+
+def _extract_first_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} object in text, or None
+
+    Single pass tracking brace depth and string state, so braces inside JSON strings
+    and trailing prose or code fences after the object are handled correctly.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+# "coverage" is the first field of the response schema, so it can be read off a partial stream
+_COVERAGE_RE = re.compile(r'"coverage"\s*:\s*"(\w+)"')
+
+
+async def _stream_llm(client, messages, on_coverage: Callable[[str], None], **kwargs) -> str:
+    """Stream a completion, calling on_coverage as soon as the coverage value has arrived"""
+    parts = []
+    buffer = ""
+    coverage_seen = False
+    async for delta in call_llm_stream(client, messages, **kwargs):
+        parts.append(delta)
+        if not coverage_seen:
+            buffer += delta
+            match = _COVERAGE_RE.search(buffer)
+            if match:
+                coverage_seen = True
+                on_coverage(match.group(1))
+    return "".join(parts)
+
+
+async def _call_judge_llm(
+    client, messages, on_coverage: Optional[Callable[[str], None]] = None, **kwargs
+) -> str:
+    """
+    call_llm, streamed when on_coverage is given
+
+    Rate limits and transient errors are retried by the OpenAI client itself
+    (LLM_MAX_RETRIES); concurrency is bounded by the caller (the asyncio.Semaphore
+    in /api/analyze).
+    """
+    if on_coverage is not None:
+        return await _stream_llm(client, messages, on_coverage, **kwargs)
+    return await call_llm(client, messages, **kwargs)
+
+
+def _numeric_tokens(text: str) -> set:
+    """Distinctive numbers in text (single digits and bare years match too easily to count)"""
+    return {
+        token for token in _NUMBER_RE.findall(text)
+        if len(token.rstrip('%')) > 1 and not _YEAR_RE.fullmatch(token)
+    }
+
+
+def _numbers_match(claim_text: str, evidence_text: str) -> bool:
+    """True if at least one of the claim's numbers appears verbatim in the evidence"""
+    claim_numbers = _numeric_tokens(claim_text)
+    return bool(claim_numbers) and not claim_numbers.isdisjoint(_numeric_tokens(evidence_text))
+
+
+def _has_strong_matching_evidence(claim: Claim, citations: List[Citation]) -> bool:
+    """Top citations are all highly similar and quote a figure from the claim"""
+    top = citations[:RULE_MIN_CITATIONS]
+    if len(top) < RULE_MIN_CITATIONS:
+        return False
+    if not all((c.similarity_score or 0.0) >= RULE_MIN_SIMILARITY for c in top):
+        return False
+    return _numbers_match(claim.claim_text, " ".join(c.quote for c in top))
+
+
+def _pick_model(claim: Claim, citations: List[Citation]) -> str:
+    """Route straightforward, well-evidenced claims to the small model"""
+    if claim.claim_type in SIMPLE_CLAIM_TYPES and len(citations) >= SMALL_MODEL_MIN_CITATIONS:
+        return LLM_MODEL_SMALL
+    if JUDGE_RULE_ROUTING and _has_strong_matching_evidence(claim, citations):
+        return LLM_MODEL_SMALL
+    return LLM_MODEL_LARGE
+
+
+def _prepare_judgment(
+    claim: Claim,
+    citations: List[Citation]
+) -> Tuple[Optional[ClaimAnalysis], List[Citation], str, Optional[List[Dict]]]:
+    """
+    Everything judge_claim does before calling the LLM
+
     Returns:
-        ClaimAnalysis object with judgment results
+        (analysis, citations, model, messages). analysis is set when no LLM call is needed
+        (no evidence or cache hit); otherwise messages is the prompt to
+        send to model. citations come back with duplicate chunks dropped.
     """
     logger.info(f"Judging claim {claim.claim_id}: {claim.claim_text[:100]}...")
     
@@ -74,124 +359,104 @@ def judge_claim(claim: Claim, citations: List[Citation]) -> ClaimAnalysis:
             confidence=0,
             gaps=["Need to locate internal documents related to claim", "May need audit reports, financial statements, contracts, etc."],
             recommended_actions=["Expand search scope", "Collect relevant internal documents", "Consult relevant departments"]
-        )
+        ), citations, LLM_MODEL, None
     
-    # Format citations for prompt
-    citations_text = "\n\n".join([
-        f"[Evidence {i+1}]\n"
-        f"Document: {cit.doc_title}\n"
-        f"Chunk ID: {cit.chunk_id}\n"
-        f"Quote: {cit.quote}\n"
-        for i, cit in enumerate(citations)
-    ])
+    # Drop repeated chunks (keeping the first, best-ranked occurrence) so they aren't paid for twice
+    seen_chunks = set()
+    unique_citations = []
+    for cit in citations:
+        if cit.chunk_id not in seen_chunks:
+            seen_chunks.add(cit.chunk_id)
+            unique_citations.append(cit)
+    if len(unique_citations) < len(citations):
+        logger.info(f"Dropped {len(citations) - len(unique_citations)} duplicate citations for {claim.claim_id}")
+        citations = unique_citations
     
-    prompt = f"""You are a professional financial analyst responsible for evaluating whether short report claims are sufficiently rebutted by internal evidence.
+    model = _pick_model(claim, citations)
+    
+    # Identical claim + evidence was judged before: skip the LLM call
+    cached = get_cached_analysis(claim, citations, model)
+    if cached is not None:
+        logger.info(f"Judgment for {claim.claim_id} served from cache: {cached.coverage}")
+        return cached, citations, model, None
+    
+    # Only the claim and its evidence vary per call; they go after the static prefix
+    fields = {
+        "claim_id": claim.claim_id,
+        "claim_type": claim.claim_type,
+        "claim_text": claim.claim_text,
+        "page_numbers": claim.page_numbers,
+        "citations_text": ""
+    }
+    encoding = _get_encoding()
+    base_tokens = len(encoding.encode(_STATIC_SYSTEM + _PROMPT_TMPL.format_map(fields))) if encoding is not None else 0
 
-{JUDGMENT_CRITERIA}
+    # Format citations for prompt (bounded, so prefill cost doesn't grow with top_k)
+    fields["citations_text"] = _build_citations_text(claim, citations, base_tokens)
+    prompt = _PROMPT_TMPL.format_map(fields)
 
-## Claim:
-ID: {claim.claim_id}
-Type: {claim.claim_type}
-Content: {claim.claim_text}
-Page Numbers: {claim.page_numbers}
+    messages = [
+        {
+            "role": "system",
+            "content": _STATIC_SYSTEM
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+    return None, citations, model, messages
 
-## Retrieved Evidence:
-{citations_text}
 
-## Task:
-Based on the judgment criteria, evaluate the above claim and return results in JSON format.
+def _judge_llm_kwargs(claim: Claim, model: str) -> Dict:
+    """Sampling arguments for a judgment call"""
+    return {
+        "model": model,
+        "temperature": TEMPERATURE,
+        "max_tokens": JUDGE_MAX_TOKENS,
+        "prompt_cache_key": f"judge:{claim.claim_type}"
+    }
 
-Output Format (JSON):
-{{
-  "coverage": "fully_addressed" | "partially_addressed" | "not_addressed",
-  "reasoning": "5-10 bullet points of analysis based on evidence",
-  "confidence": integer 0-100,
-  "gaps": ["missing evidence type 1", "missing evidence type 2"] (if not fully addressed),
-  "recommended_actions": ["recommended action 1", "recommended action 2"]
-}}
 
-Important Notes:
-- Must strictly follow judgment criteria
-- If evidence is weak or not relevant, must classify as "not_addressed"
-- Must cite all evidence pieces used (mention explicitly in reasoning)
-- reasoning must contain 5-10 bullet points
-- If coverage is not "fully_addressed", must provide gaps and recommended_actions
+def _parse_judgment(claim: Claim, citations: List[Citation], model: str, content: str) -> ClaimAnalysis:
+    """Build (and cache) the ClaimAnalysis from the LLM's response"""
+    if not content:
+        raise ValueError("LLM returned empty response")
+    
+    # Parse JSON: the whole response first (the usual case), else the first {...} object in it
+    judgment_data = None
+    try:
+        judgment_data = _loads_json(content.strip())
+    except json.JSONDecodeError:
+        pass
+    if not isinstance(judgment_data, dict):
+        json_str = _extract_first_json_object(content) or content.strip()
+        judgment_data = _loads_json(json_str)
+    
+    # Validate and create ClaimAnalysis (normalization lives in the model's validators)
+    # For now, include all citations as the ones used
+    analysis = ClaimAnalysis.model_validate({
+        "coverage": "not_addressed",
+        "reasoning": "Unable to generate analysis",
+        "confidence": 0,
+        **judgment_data,
+        "claim_id": claim.claim_id,
+        "citations": citations
+    })
+    
+    logger.info(f"Judgment for {claim.claim_id}: {analysis.coverage} (confidence: {analysis.confidence})")
+    store_analysis(claim, citations, analysis, model)
+    return analysis
 
-Return ONLY valid JSON, do not include other text."""
 
-    try:
-        # Call OpenAI API
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a professional financial analyst skilled at evaluating evidence quality. Always return valid JSON format."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-
-        logger.info(f"Calling OpenAI API for judgment")
-        content = call_llm(messages, temperature=TEMPERATURE, max_tokens=2000)
-        
-        if not content:
-            raise ValueError("LLM returned empty response")
-        
-        # Extract JSON from response
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            json_str = json_match.group(0)
-        else:
-            json_str = content.strip()
-        
-        # Parse JSON
-        judgment_data = json.loads(json_str)
-        
-        # Validate and create ClaimAnalysis
-        coverage = judgment_data.get("coverage", "not_addressed")
-        if coverage not in ["fully_addressed", "partially_addressed", "not_addressed"]:
-            coverage = "not_addressed"
-        
-        reasoning = judgment_data.get("reasoning", "Unable to generate analysis")
-        # Convert reasoning to string if it's a list
-        if isinstance(reasoning, list):
-            reasoning = "\n".join([f"• {item}" if not item.startswith("•") else item for item in reasoning])
-        elif not isinstance(reasoning, str):
-            reasoning = str(reasoning)
-        
-        confidence = int(judgment_data.get("confidence", 0))
-        confidence = max(0, min(100, confidence))  # Clamp to 0-100
-        
-        gaps = judgment_data.get("gaps", [])
-        if coverage == "fully_addressed":
-            gaps = None
-        
-        recommended_actions = judgment_data.get("recommended_actions", [])
-        if not recommended_actions and coverage != "fully_addressed":
-            recommended_actions = ["Requires further investigation", "Collect more evidence"]
-        
-        # Filter citations to only those actually used (if we can determine)
-        # For now, include all citations
-        used_citations = citations
-        
-        analysis = ClaimAnalysis(
-            claim_id=claim.claim_id,
-            coverage=coverage,
-            reasoning=reasoning,
-            citations=used_citations,
-            confidence=confidence,
-            gaps=gaps if gaps else None,
-            recommended_actions=recommended_actions if recommended_actions else None
-        )
-        
-        logger.info(f"Judgment for {claim.claim_id}: {coverage} (confidence: {confidence})")
-        return analysis
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from LLM response: {e}")
-        logger.debug(f"LLM response: {content[:500]}")
-        # Return default analysis
+def _failed_judgment(
+    claim: Claim, citations: List[Citation], error: Exception, content: Optional[str]
+) -> ClaimAnalysis:
+    """Default analysis when the LLM call or its response handling failed"""
+    if isinstance(error, json.JSONDecodeError):
+        logger.error(f"Failed to parse JSON from LLM response: {error}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LLM response: %s", (content or "")[:500])
         return ClaimAnalysis(
             claim_id=claim.claim_id,
             coverage="not_addressed",
@@ -201,18 +466,108 @@ Return ONLY valid JSON, do not include other text."""
             gaps=["Requires manual review"],
             recommended_actions=["Check LLM response format"]
         )
-    except requests.exceptions.RequestException as e:
+    logger.error(f"Error judging claim: {error}")
+    return ClaimAnalysis(
+        claim_id=claim.claim_id,
+        coverage="not_addressed",
+        reasoning=f"Error occurred during processing: {str(error)}",
+        citations=citations,
+        confidence=0,
+        gaps=["Requires reprocessing"],
+        recommended_actions=["Check system errors"]
+    )
+
+
+async def judge_claim(
+    claim: Claim,
+    citations: List[Citation],
+    client,
+    on_coverage: Optional[Callable[[str], None]] = None
+) -> ClaimAnalysis:
+    """
+    Judge whether a claim is fully/partially/not addressed by the evidence
+    
+    Args:
+        claim: The claim to judge
+        citations: Retrieved evidence citations
+        client: Shared AsyncOpenAI client (see config.create_async_openai_client)
+        on_coverage: Optional progress callback. When given, the LLM response is
+            streamed and the callback receives the coverage value as soon as it is
+            generated, before the (much longer) reasoning has finished.
+    
+    Returns:
+        ClaimAnalysis object with judgment results
+    """
+    # Cache lookups/writes (SQLite) and token counting stay off the event loop
+    analysis, citations, model, messages = await asyncio.to_thread(_prepare_judgment, claim, citations)
+    if analysis is not None:
+        return analysis
+
+    content = None
+    try:
+        logger.info(f"Calling OpenAI API for judgment ({model})")
+        content = await _call_judge_llm(
+            client, messages, on_coverage=on_coverage, **_judge_llm_kwargs(claim, model)
+        )
+        return await asyncio.to_thread(_parse_judgment, claim, citations, model, content)
+    except llm_connection_errors() as e:
         logger.error(f"Failed to call OpenAI API: {e}")
         raise ConnectionError(f"Failed to connect to OpenAI API: {e}")
     except Exception as e:
-        logger.error(f"Error judging claim: {e}")
-        # Return default analysis
-        return ClaimAnalysis(
-            claim_id=claim.claim_id,
-            coverage="not_addressed",
-            reasoning=f"Error occurred during processing: {str(e)}",
-            citations=citations,
-            confidence=0,
-            gaps=["Requires reprocessing"],
-            recommended_actions=["Check system errors"]
-        )
+        return _failed_judgment(claim, citations, e, content)
+
+
+def error_analysis(claim: Claim, error: Exception) -> ClaimAnalysis:
+    """Placeholder analysis for a claim whose retrieval or judgment raised"""
+    return ClaimAnalysis(
+        claim_id=claim.claim_id,
+        coverage="not_addressed",
+        reasoning=f"Error occurred during processing: {str(error)}",
+        citations=[],
+        confidence=0,
+        gaps=["Requires reprocessing"],
+        recommended_actions=["Check system errors"]
+    )
+
+
+def log_early_coverage(claim: Claim) -> Callable[[str], None]:
+    """Progress callback that logs a claim's coverage as soon as it streams in"""
+    def log(coverage: str) -> None:
+        logger.info(f"Claim {claim.claim_id}: coverage '{coverage}' received, awaiting reasoning")
+    return log
+
+
+async def judge_claims_batch(
+    items: List[Tuple[Claim, List[Citation]]],
+    client,
+    max_concurrency: int = JUDGE_BATCH_CONCURRENCY
+) -> List[ClaimAnalysis]:
+    """
+    Judge several claims concurrently, with at most max_concurrency LLM calls in flight
+    
+    Args:
+        items: (claim, citations) pairs to judge
+        client: Shared AsyncOpenAI client (see config.create_async_openai_client)
+        max_concurrency: Upper bound on concurrent judgments, to stay under LLM rate limits
+    
+    Returns:
+        One ClaimAnalysis per item, in input order; a claim whose judgment raised
+        gets error_analysis instead of failing the whole batch
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def judge_one(claim: Claim, citations: List[Citation]) -> ClaimAnalysis:
+        async with semaphore:
+            return await judge_claim(claim, citations, client, log_early_coverage(claim))
+    
+    results = await asyncio.gather(
+        *(judge_one(claim, citations) for claim, citations in items),
+        return_exceptions=True
+    )
+    analyses = []
+    for (claim, _), result in zip(items, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error analyzing claim {claim.claim_id}: {result}")
+            result = error_analysis(claim, result)
+        analyses.append(result)
+    return analyses
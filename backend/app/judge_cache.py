@@ -0,0 +1,111 @@
+"""
+Judge cache module: Reuse LLM judgments for identical (claim, evidence) inputs
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from typing import List, Optional
+
+from app.config import LLM_MODEL, TEMPERATURE, REPORTS_DIR, ensure_dir
+from app.models import Claim, ClaimAnalysis, Citation
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = REPORTS_DIR / "judge_cache.sqlite3"
+CACHE_TTL_SECONDS = 7 * 24 * 3600  # 7 days
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database (one short-lived connection per call keeps this thread-safe)"""
+    ensure_dir(CACHE_PATH.parent)
+    conn = sqlite3.connect(str(CACHE_PATH), timeout=10)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS judgments (key TEXT PRIMARY KEY, analysis TEXT NOT NULL, expires_at REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS judgments_expires_at ON judgments (expires_at)")
+    return conn
+
+
+def make_cache_key(claim: Claim, citations: List[Citation], model: str = LLM_MODEL) -> str:
+    """
+    Build the cache key for a judgment
+
+    The key covers the normalized claim text, each evidence chunk's ID, title and text,
+    the model and the temperature. Chunk IDs are derived from file names and survive
+    re-indexing, so the text is what catches edited documents. The claim ID is
+    deliberately excluded so the same claim in a re-uploaded report still hits.
+    """
+    normalized = re.sub(r'\s+', ' ', claim.claim_text.lower().strip())
+    payload = json.dumps({
+        "claim": normalized,
+        "cites": sorted([c.chunk_id, c.doc_title, c.quote] for c in citations),
+        "model": model,
+        "temp": TEMPERATURE
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_cached_analysis(
+    claim: Claim, citations: List[Citation], model: str = LLM_MODEL
+) -> Optional[ClaimAnalysis]:
+    """
+    Look up a previous judgment for this claim and evidence
+
+    Returns:
+        ClaimAnalysis re-labelled with the current claim ID and citations, or None on miss
+    """
+    key = make_cache_key(claim, citations, model)
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT analysis FROM judgments WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Judge cache lookup failed: {e}")
+        return None
+
+    if row is None:
+        return None
+
+    cached = ClaimAnalysis.model_validate_json(row[0])
+    return cached.model_copy(update={"claim_id": claim.claim_id, "citations": citations})
+
+
+def store_analysis(
+    claim: Claim, citations: List[Citation], analysis: ClaimAnalysis, model: str = LLM_MODEL
+) -> None:
+    """Save a judgment for CACHE_TTL_SECONDS, deleting expired ones so the file doesn't keep growing"""
+    key = make_cache_key(claim, citations, model)
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM judgments WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO judgments (key, analysis, expires_at) VALUES (?, ?, ?)",
+                    (key, analysis.model_dump_json(), now + CACHE_TTL_SECONDS)
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Judge cache write failed: {e}")
+
+
+def clear_judge_cache() -> None:
+    """Drop all stored judgments (after re-indexing, when the evidence may have changed)"""
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM judgments")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Judge cache clear failed: {e}")
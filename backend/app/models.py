@@ -1,8 +1,8 @@
 """
 Pydantic models for request/response schemas
 """
-from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from typing import Any, List, Optional, Literal
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
 
 
@@ -35,6 +35,43 @@ class ClaimAnalysis(BaseModel):
     gaps: Optional[List[str]] = Field(None, description="Missing evidence types if not fully addressed")
     recommended_actions: Optional[List[str]] = Field(None, description="Recommended follow-up actions")
 
+    # LLM output is loosely typed, so these validators normalize it rather than reject it
+
+    @field_validator("coverage", mode="before")
+    @classmethod
+    def _coerce_coverage(cls, value: Any) -> Any:
+        """Unknown coverage labels are treated as not addressed"""
+        if value not in ("fully_addressed", "partially_addressed", "not_addressed"):
+            return "not_addressed"
+        return value
+
+    @field_validator("reasoning", mode="before")
+    @classmethod
+    def _join_reasoning(cls, value: Any) -> Any:
+        """Convert reasoning to a bulleted string if it's a list"""
+        if isinstance(value, list):
+            return "\n".join(item if item.startswith("•") else f"• {item}" for item in map(str, value))
+        if not isinstance(value, str):
+            return str(value)
+        return value
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _clamp_confidence(cls, value: Any) -> int:
+        """Clamp to 0-100"""
+        return max(0, min(100, int(value)))
+
+    @model_validator(mode="after")
+    def _fill_gaps_and_actions(self) -> "ClaimAnalysis":
+        """Fully addressed claims have no gaps; others always get follow-up actions"""
+        if self.coverage == "fully_addressed":
+            self.gaps = None
+        elif not self.recommended_actions:
+            self.recommended_actions = ["Requires further investigation", "Collect more evidence"]
+        self.gaps = self.gaps or None
+        self.recommended_actions = self.recommended_actions or None
+        return self
+
 
 class UploadOnlyResponse(BaseModel):
     """Response after uploading a report (without claim extraction)"""
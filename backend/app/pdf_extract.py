@@ -1,14 +1,27 @@
 """
 Document extraction module: Extract text from PDF, DOCX, and TXT files
 """
+import contextlib
+import hashlib
+import json
 import logging
+import sqlite3
+import threading
+import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 # Try to import PDF libraries
+HAS_PDFIUM = False
 HAS_PYPDF = False
 HAS_PDFPLUMBER = False
 
+try:
+    import pypdfium2 as pdfium
+    HAS_PDFIUM = True
+except ImportError:
+    pass
+
 try:
     from pypdf import PdfReader
     HAS_PYPDF = True
@@ -21,6 +34,14 @@ try:
 except ImportError:
     pass
 
+# charset-normalizer ships with requests; used to detect non-UTF-8 text encodings
+HAS_CHARSET_NORMALIZER = False
+try:
+    import charset_normalizer
+    HAS_CHARSET_NORMALIZER = True
+except ImportError:
+    pass
+
 # Try to import DOCX library
 HAS_DOCX = False
 try:
@@ -29,17 +50,65 @@ try:
 except ImportError:
     pass
 
-if not HAS_PYPDF and not HAS_PDFPLUMBER:
-    raise ImportError("Please install either pypdf or pdfplumber: pip install pypdf or pip install pdfplumber")
+if not HAS_PDFIUM and not HAS_PYPDF and not HAS_PDFPLUMBER:
+    raise ImportError("Please install a PDF library: pip install pypdfium2 (recommended), pypdf or pdfplumber")
 
-from app.config import MAX_PAGES
+from app.config import MAX_PAGES, REPORTS_DIR, ensure_dir
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_SUFFIXES = ('.pdf', '.txt', '.docx', '.doc')
+
+# Extracted pages keyed by file content hash, stored as JSON; the newest entries are kept
+EXTRACT_CACHE_PATH = REPORTS_DIR / "extract_cache.sqlite3"
+EXTRACT_CACHE_MAX_ENTRIES = 1000
+# Part of the cache key: bump whenever extraction output can change (backends, fallbacks),
+# so documents seen before an extractor change are parsed again
+EXTRACTOR_VERSION = 2
+
+# PDFium is not thread-safe, so calls into it are serialized within a process
+_pdfium_lock = threading.Lock()
+
+
+def _pages_with_fallback(pdf_path: Path, texts: List[Optional[str]]) -> List[Tuple[int, str]]:
+    """
+    Turn per-page texts into (page_number, text) tuples, retrying empty pages with pdfplumber
+
+    Args:
+        pdf_path: Path to the PDF the texts came from
+        texts: Text of each page in order; None for pages whose extraction failed
+
+    Returns:
+        Pages with text; pages that failed and have no fallback text stay as (page_number, "")
+    """
+    pages = []
+    with contextlib.ExitStack() as stack:
+        plumber_pdf = None
+        for idx, text in enumerate(texts):
+            if not (text and text.strip()) and HAS_PDFPLUMBER:
+                # No text layer found (scanned page, CID fonts, ...): retry only this page
+                # with pdfplumber, opening it at most once per document
+                try:
+                    if plumber_pdf is None:
+                        plumber_pdf = stack.enter_context(pdfplumber.open(str(pdf_path)))
+                    text = plumber_pdf.pages[idx].extract_text() or text
+                except Exception as e:
+                    logger.warning(f"pdfplumber fallback failed for page {idx + 1}: {e}")
+            if text is None:
+                pages.append((idx + 1, ""))
+            elif text.strip():
+                pages.append((idx + 1, text.strip()))
+                logger.debug("Extracted %d characters from page %d", len(text), idx + 1)
+    return pages
+
 
 def extract_pdf_text(pdf_path: Path, max_pages: int = MAX_PAGES) -> List[Tuple[int, str]]:
     """
     Extract text from PDF, only processing first max_pages pages
+
+    pypdfium2 is used when installed (pdfplumber depends on it, so it normally is);
+    pypdf and then pdfplumber only handle documents PDFium can't open. Pages without
+    text are retried individually with pdfplumber.
     
     Args:
         pdf_path: Path to PDF file
@@ -53,21 +122,45 @@ def extract_pdf_text(pdf_path: Path, max_pages: int = MAX_PAGES) -> List[Tuple[i
     
     logger.info(f"Extracting text from {pdf_path}, processing first {max_pages} pages")
     
+    if HAS_PDFIUM:
+        try:
+            # pypdfium2 binds Google's PDFium (C++); the fastest backend available here
+            texts = []
+            
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(str(pdf_path))
+                try:
+                    for i in range(min(max_pages, len(pdf))):
+                        try:
+                            page = pdf[i]
+                            textpage = page.get_textpage()
+                            texts.append(textpage.get_text_range())
+                            textpage.close()
+                            page.close()
+                        except Exception as e:
+                            logger.warning(f"Failed to extract text from page {i + 1}: {e}")
+                            texts.append(None)
+                finally:
+                    pdf.close()
+            
+            pages = _pages_with_fallback(pdf_path, texts)
+            logger.info(f"Successfully extracted text from {len(pages)} pages using pypdfium2")
+            return pages
+        except Exception as e:
+            logger.warning(f"pypdfium2 failed, trying other backends: {e}")
+    
     if HAS_PYPDF:
         try:
-            # Try pypdf first
             reader = PdfReader(str(pdf_path))
-            pages = []
-            
-            for i, page in enumerate(reader.pages[:max_pages], start=1):
+            texts = []
+            for idx in range(min(max_pages, len(reader.pages))):
                 try:
-                    text = page.extract_text()
-                    if text.strip():
-                        pages.append((i, text.strip()))
-                        logger.debug(f"Extracted {len(text)} characters from page {i}")
+                    texts.append(reader.pages[idx].extract_text() or "")
                 except Exception as e:
-                    logger.warning(f"Failed to extract text from page {i}: {e}")
-                    pages.append((i, ""))
+                    logger.warning(f"Failed to extract text from page {idx + 1}: {e}")
+                    texts.append(None)
+            
+            pages = _pages_with_fallback(pdf_path, texts)
             
             logger.info(f"Successfully extracted text from {len(pages)} pages")
             return pages
@@ -85,7 +178,7 @@ def extract_pdf_text(pdf_path: Path, max_pages: int = MAX_PAGES) -> List[Tuple[i
                         text = page.extract_text()
                         if text:
                             pages.append((i, text.strip()))
-                            logger.debug(f"Extracted {len(text)} characters from page {i}")
+                            logger.debug("Extracted %d characters from page %d", len(text), i)
                     except Exception as e:
                         logger.warning(f"Failed to extract text from page {i}: {e}")
                         pages.append((i, ""))
@@ -130,17 +223,37 @@ def extract_txt_text(txt_path: Path) -> List[Tuple[int, str]]:
     logger.info(f"Extracting text from {txt_path}")
 
     try:
-        text = txt_path.read_text(encoding='utf-8')
-        logger.info(f"Successfully extracted {len(text)} characters from text file")
-        return [(1, text.strip())]
-    except UnicodeDecodeError:
-        # Try different encoding
+        # Read once; a failed UTF-8 decode falls back to detection on the same bytes
+        data = txt_path.read_bytes()
         try:
-            text = txt_path.read_text(encoding='latin-1')
-            logger.info(f"Successfully extracted {len(text)} characters from text file (latin-1)")
-            return [(1, text.strip())]
-        except Exception as e:
-            raise RuntimeError(f"Failed to extract text from TXT file: {e}")
+            text = data.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError:
+            best = charset_normalizer.from_bytes(data).best() if HAS_CHARSET_NORMALIZER else None
+            if best is not None:
+                text, encoding = str(best), best.encoding
+            else:
+                text, encoding = data.decode('latin-1', errors='replace'), 'latin-1'
+        logger.info(f"Successfully extracted {len(text)} characters from text file ({encoding})")
+        return [(1, text.strip())]
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract text from TXT file: {e}")
+
+
+def _iter_docx_chunks(doc) -> Iterator[str]:
+    """Yield non-empty paragraphs, then table rows joined with ' | ', in one pass"""
+    # Extract text from all paragraphs
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            yield text
+
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            cells = [t for t in (cell.text.strip() for cell in row.cells) if t]
+            if cells:
+                yield " | ".join(cells)
 
 
 def extract_docx_text(docx_path: Path) -> List[Tuple[int, str]]:
@@ -164,23 +277,7 @@ def extract_docx_text(docx_path: Path) -> List[Tuple[int, str]]:
     try:
         doc = Document(str(docx_path))
 
-        # Extract text from all paragraphs
-        text_parts = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text.strip())
-
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    text_parts.append(" | ".join(row_text))
-
-        full_text = "\n\n".join(text_parts)
+        full_text = "\n\n".join(_iter_docx_chunks(doc))
         logger.info(f"Successfully extracted {len(full_text)} characters from DOCX file")
         return [(1, full_text)]
 
@@ -188,10 +285,71 @@ def extract_docx_text(docx_path: Path) -> List[Tuple[int, str]]:
         raise RuntimeError(f"Failed to extract text from DOCX file: {e}")
 
 
+def _file_sha256(file_path: Path) -> str:
+    """SHA-256 of a file's contents, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _connect_extract_cache() -> sqlite3.Connection:
+    """Open the extraction cache database (one short-lived connection per call)"""
+    ensure_dir(EXTRACT_CACHE_PATH.parent)
+    conn = sqlite3.connect(str(EXTRACT_CACHE_PATH), timeout=10)
+    # Earlier versions pickled pages into "extractions"; those rows are never read again
+    conn.execute("DROP TABLE IF EXISTS extractions")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS extracted_pages (key TEXT PRIMARY KEY, pages TEXT NOT NULL, created_at REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS extracted_pages_created_at ON extracted_pages (created_at)")
+    return conn
+
+
+def _get_cached_extraction(key: str) -> Optional[List[Tuple[int, str]]]:
+    try:
+        conn = _connect_extract_cache()
+        try:
+            row = conn.execute("SELECT pages FROM extracted_pages WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Extraction cache lookup failed: {e}")
+        return None
+    if row is None:
+        return None
+    return [(page_num, text) for page_num, text in json.loads(row[0])]
+
+
+def _store_extraction(key: str, pages: List[Tuple[int, str]]) -> None:
+    """Save extracted pages, dropping the oldest entries beyond EXTRACT_CACHE_MAX_ENTRIES"""
+    try:
+        conn = _connect_extract_cache()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO extracted_pages (key, pages, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(pages, ensure_ascii=False), time.time())
+                )
+                conn.execute(
+                    "DELETE FROM extracted_pages WHERE key NOT IN "
+                    "(SELECT key FROM extracted_pages ORDER BY created_at DESC LIMIT ?)",
+                    (EXTRACT_CACHE_MAX_ENTRIES,)
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"Extraction cache write failed: {e}")
+
+
 def extract_document_text(file_path: Path, max_pages: int = MAX_PAGES) -> List[Tuple[int, str]]:
     """
     Generic document text extraction - handles PDF, TXT, and DOCX files
 
+    Results are cached on disk by file content, so re-uploading the same document
+    (even under a new report ID) skips parsing entirely.
+
     Args:
         file_path: Path to document file
         max_pages: Maximum number of pages to process (for PDF only)
@@ -203,7 +361,24 @@ def extract_document_text(file_path: Path, max_pages: int = MAX_PAGES) -> List[T
         raise FileNotFoundError(f"File not found: {file_path}")
 
     suffix = file_path.suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError(f"Unsupported file format: {suffix}. Supported formats: .pdf, .txt, .docx")
+
+    # max_pages only affects PDFs, but keying on it everywhere keeps the key simple
+    key = f"{_file_sha256(file_path)}:{suffix}:{max_pages}:v{EXTRACTOR_VERSION}"
+    pages = _get_cached_extraction(key)
+    if pages is not None:
+        logger.info(f"Using cached text extraction for {file_path.name}")
+        return pages
+
+    pages = _extract_document_text_uncached(file_path, suffix, max_pages)
+    if pages:
+        _store_extraction(key, pages)
+    return pages
+
 
+def _extract_document_text_uncached(file_path: Path, suffix: str, max_pages: int) -> List[Tuple[int, str]]:
+    """Dispatch to the extractor for suffix"""
     if suffix == '.pdf':
         return extract_pdf_text(file_path, max_pages)
     elif suffix == '.txt':
@@ -218,9 +218,9 @@ def generate_json_report(
     return {
         "report_id": report_id,
         "generated_at": datetime.now().isoformat(),
-        "summary": summary.dict(),
-        "claims": [c.dict() for c in claims],
-        "analyses": [a.dict() for a in analyses]
+        "summary": summary.model_dump(),
+        "claims": [c.model_dump() for c in claims],
+        "analyses": [a.model_dump() for a in analyses]
     }
 
 
@@ -2,25 +2,26 @@
 Retrieval module: Retrieve relevant documents from vector database for a given claim
 """
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import chromadb
 from chromadb.config import Settings
 
 from app.config import (
     CHROMA_DIR, EMBED_MODEL, DEFAULT_TOP_K,
-    openai_client, EMBED_DIMENSION, is_embedding_dimension_mismatch,
+    get_openai_client, EMBED_DIMENSION, is_embedding_dimension_mismatch,
     get_dimension_change_info
 )
+from app.index_internal import get_embeddings_batch, sync_chroma_generation
 from app.models import Citation
 from app.utils import logger
 
 logger = logging.getLogger(__name__)
 
-
 def get_embedding(text: str) -> List[float]:
     """Get embedding for text using OpenAI"""
     try:
+        openai_client = get_openai_client()
         if not openai_client:
             raise ConnectionError("OpenAI client not initialized. Please set OPENAI_API_KEY.")
 
@@ -40,21 +41,95 @@ def get_embedding(text: str) -> List[float]:
         raise ConnectionError(f"Failed to get embeddings from OpenAI: {e}")
 
 
-def retrieve_relevant_documents(claim_text: str, top_k: int = DEFAULT_TOP_K) -> List[Citation]:
+def _distance_to_similarity(distance: float, space: str) -> float:
+    """
+    Cosine similarity for a ChromaDB distance in the given space
+
+    OpenAI embeddings are unit length, so squared L2 distance (Chroma's "l2", the default
+    for collections created before "cosine" was set) is 2 - 2*cos; "cosine" and "ip"
+    distances are 1 - cos.
+    """
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+def _citations_from_results(results: Dict, i: int, space: str = "cosine") -> List[Citation]:
+    """Convert the i-th query's results of a collection.query() call to Citation objects"""
+    citations = []
+    ids = results['ids'][i] if results['ids'] else []
+    if not ids:
+        return citations
+
+    distances = results['distances'][i] if results.get('distances') else [0.0] * len(ids)
+    for doc_id, metadata, document, distance in zip(
+        ids,
+        results['metadatas'][i],
+        results['documents'][i],
+        distances
+    ):
+        # Convert distance to similarity score (lower distance = higher similarity)
+        similarity = max(0.0, min(1.0, _distance_to_similarity(distance, space))) if distance is not None else 0.0
+        
+        citation = Citation(
+            doc_id=metadata.get('doc_id', doc_id),
+            doc_title=metadata.get('doc_title', 'Unknown'),
+            chunk_id=metadata.get('chunk_id', doc_id),
+            quote=document[:500] if len(document) > 500 else document,  # First 500 chars as quote
+            similarity_score=round(similarity, 4)
+        )
+        citations.append(citation)
+        logger.debug("Retrieved: %s (similarity: %.4f)", citation.doc_title, similarity)
+    return citations
+
+
+def retrieve_relevant_documents(
+    claim_text: str,
+    top_k: int = DEFAULT_TOP_K,
+    query_embedding: Optional[List[float]] = None
+) -> List[Citation]:
     """
     Retrieve relevant documents for a given claim
 
     Args:
         claim_text: The claim text to search for
         top_k: Number of documents to retrieve
+        query_embedding: Embedding of claim_text, if the caller already has it
 
     Returns:
         List of Citation objects
     """
     logger.info(f"Retrieving documents for claim: {claim_text[:100]}...")
+    query_embeddings = [query_embedding] if query_embedding is not None else None
+    return retrieve_relevant_documents_batch([claim_text], top_k, query_embeddings)[0]
+
+
+def retrieve_relevant_documents_batch(
+    claim_texts: List[str],
+    top_k: int = DEFAULT_TOP_K,
+    query_embeddings: Optional[List[List[float]]] = None
+) -> List[List[Citation]]:
+    """
+    Retrieve relevant documents for several claims with a single ChromaDB query
+
+    Args:
+        claim_texts: The claim texts to search for
+        top_k: Number of documents to retrieve per claim
+        query_embeddings: Embeddings of claim_texts, if the caller already has them
+
+    Returns:
+        One list of Citation objects per claim, in the same order as claim_texts
+        (empty lists if retrieval failed)
+    """
+    empty = [[] for _ in claim_texts]
+    if not claim_texts:
+        return empty
+    if len(claim_texts) > 1:
+        logger.info(f"Retrieving documents for {len(claim_texts)} claims in one query")
 
     try:
         # Initialize ChromaDB
+        sync_chroma_generation()
         client = chromadb.PersistentClient(
             path=str(CHROMA_DIR),
             settings=Settings(anonymized_telemetry=False)
@@ -65,7 +140,7 @@ def retrieve_relevant_documents(claim_text: str, top_k: int = DEFAULT_TOP_K) ->
             collection = client.get_collection("internal_documents")
         except Exception:
             logger.error("ChromaDB collection 'internal_documents' not found. Please run index_internal.py first.")
-            return []
+            return empty
 
         # Validate embedding dimension compatibility
         collection_metadata = collection.metadata or {}
@@ -79,46 +154,27 @@ def retrieve_relevant_documents(claim_text: str, top_k: int = DEFAULT_TOP_K) ->
                 logger.error(f"Please run: python -m app.index_internal")
                 logger.error(f"Or delete the collection: rm -rf {CHROMA_DIR}")
 
-                # Return empty list to avoid cryptic ChromaDB error
-                return []
+                # Return empty lists to avoid cryptic ChromaDB error
+                return empty
         else:
             logger.warning("Collection has no embedding_dimension metadata. Attempting retrieval anyway.")
         
-        # Get embedding for claim
-        query_embedding = get_embedding(claim_text)
+        # Get embeddings for claims
+        if query_embeddings is None:
+            query_embeddings = get_embeddings_batch(claim_texts)
         
-        # Search
+        # Search (one query for all claims)
         results = collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k
         )
         
         # Convert to Citation objects
-        citations = []
+        space = collection_metadata.get("hnsw:space", "l2")
+        citations_per_claim = [_citations_from_results(results, i, space) for i in range(len(claim_texts))]
         
-        if results['ids'] and len(results['ids'][0]) > 0:
-            for i, (doc_id, metadata, document, distance) in enumerate(zip(
-                results['ids'][0],
-                results['metadatas'][0],
-                results['documents'][0],
-                results['distances'][0] if 'distances' in results else [0.0] * len(results['ids'][0])
-            )):
-                # Convert distance to similarity score (lower distance = higher similarity)
-                # ChromaDB uses cosine distance, so similarity = 1 - distance
-                similarity = max(0.0, min(1.0, 1.0 - distance)) if distance is not None else 0.0
-                
-                citation = Citation(
-                    doc_id=metadata.get('doc_id', doc_id),
-                    doc_title=metadata.get('doc_title', 'Unknown'),
-                    chunk_id=metadata.get('chunk_id', doc_id),
-                    quote=document[:500] if len(document) > 500 else document,  # First 500 chars as quote
-                    similarity_score=round(similarity, 4)
-                )
-                citations.append(citation)
-                logger.debug(f"Retrieved: {citation.doc_title} (similarity: {similarity:.4f})")
-        
-        logger.info(f"Retrieved {len(citations)} relevant documents")
-        return citations
+        logger.info(f"Retrieved {sum(map(len, citations_per_claim))} relevant documents")
+        return citations_per_claim
         
     except Exception as e:
         error_str = str(e).lower()
@@ -133,4 +189,4 @@ def retrieve_relevant_documents(claim_text: str, top_k: int = DEFAULT_TOP_K) ->
         else:
             logger.error(f"Error retrieving documents: {e}")
 
-        return []
+        return empty
@@ -0,0 +1,156 @@
+"""
+Semantic cache module: Reuse retrieval results for claims that mean the same thing
+
+Claims within a report (and across re-runs) often paraphrase each other. Each claim
+is embedded once; if a recently retrieved claim's embedding is close enough, its
+citations are returned without querying ChromaDB.
+"""
+import logging
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import DEFAULT_TOP_K, EMBED_DIMENSION
+from app.index_internal import get_embeddings_batch, index_generation
+from app.models import Citation
+from app.retrieval import get_embedding, retrieve_relevant_documents_batch
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_SIZE = 4096
+SEMANTIC_CACHE_INITIAL_ROWS = 64
+SIMILARITY_THRESHOLD = 0.95  # Cosine similarity needed to reuse another claim's citations
+
+
+class SemanticCache:
+    """
+    Bounded cache of (normalized embedding, top_k, citations), evicting the least recently used
+
+    Embeddings live in one float32 matrix so a lookup is a single matrix-vector
+    product. The matrix starts small and doubles as entries arrive, up to capacity.
+    Entries are tagged with the index generation they were retrieved from and are
+    dropped when it changes. Safe to use from several threads.
+    """
+
+    def __init__(self, capacity: int = SEMANTIC_CACHE_SIZE, dimension: int = EMBED_DIMENSION):
+        self._capacity = capacity
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._entries: List[Tuple[int, List[Citation]]] = []
+        self._order = deque()  # Slot indices, least recently used first
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def sync_generation(self, generation) -> None:
+        """Drop every entry if the index has changed since they were stored"""
+        with self._lock:
+            if generation != self._generation:
+                if self._entries:
+                    logger.info("Index changed, clearing semantic cache")
+                self._clear()
+                self._generation = generation
+
+    def lookup(self, vector: np.ndarray, top_k: int) -> Optional[List[Citation]]:
+        """Citations of the most similar cached claim retrieved with at least top_k results, or None"""
+        with self._lock:
+            size = len(self._entries)
+            if size == 0:
+                return None
+            similarities = self._vectors[:size] @ vector
+            # Entries retrieved with a smaller top_k can't answer this query
+            for slot in np.argsort(similarities)[::-1]:
+                if similarities[slot] < SIMILARITY_THRESHOLD:
+                    return None
+                cached_top_k, citations = self._entries[slot]
+                if cached_top_k >= top_k:
+                    self._order.remove(slot)
+                    self._order.append(slot)
+                    return citations[:top_k]
+            return None
+
+    def store(self, vector: np.ndarray, top_k: int, citations: List[Citation]) -> None:
+        with self._lock:
+            if len(self._entries) < self._capacity:
+                slot = len(self._entries)
+                if slot == len(self._vectors):
+                    rows = min(self._capacity, max(SEMANTIC_CACHE_INITIAL_ROWS, 2 * slot))
+                    grown = np.zeros((rows, self._vectors.shape[1]), dtype=np.float32)
+                    grown[:slot] = self._vectors
+                    self._vectors = grown
+                self._entries.append((top_k, citations))
+            else:
+                slot = self._order.popleft()
+                self._entries[slot] = (top_k, citations)
+            self._vectors[slot] = vector
+            self._order.append(slot)
+
+    def _clear(self) -> None:
+        self._vectors = np.zeros((0, self._vectors.shape[1]), dtype=np.float32)
+        self._entries = []
+        self._order.clear()
+
+
+_cache = SemanticCache()
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def get_or_retrieve(claim_text: str, top_k: int = DEFAULT_TOP_K) -> List[Citation]:
+    """
+    Retrieve relevant documents for a claim, reusing a semantically identical claim's results
+
+    The claim is embedded exactly once, whether or not the cache hits.
+
+    Args:
+        claim_text: The claim text to search for
+        top_k: Number of documents to retrieve
+
+    Returns:
+        List of Citation objects
+    """
+    return get_or_retrieve_many([claim_text], top_k, [get_embedding(claim_text)])[0]
+
+
+def get_or_retrieve_many(
+    claim_texts: List[str],
+    top_k: int = DEFAULT_TOP_K,
+    embeddings: Optional[List[List[float]]] = None
+) -> List[List[Citation]]:
+    """
+    Batch version of get_or_retrieve
+
+    All claims are embedded in one request, and every cache miss is answered by a
+    single ChromaDB query.
+
+    Returns:
+        One list of Citation objects per claim, in the same order as claim_texts
+    """
+    if not claim_texts:
+        return []
+    _cache.sync_generation(index_generation())
+    if embeddings is None:
+        embeddings = get_embeddings_batch(claim_texts)
+    vectors = [_normalize(embedding) for embedding in embeddings]
+
+    results: List[Optional[List[Citation]]] = [_cache.lookup(vector, top_k) for vector in vectors]
+    misses = [i for i, citations in enumerate(results) if citations is None]
+    if len(misses) < len(claim_texts):
+        logger.info(f"Semantic cache: {len(claim_texts) - len(misses)} hits, {len(misses)} misses")
+
+    if misses:
+        retrieved = retrieve_relevant_documents_batch(
+            [claim_texts[i] for i in misses], top_k=top_k, query_embeddings=[embeddings[i] for i in misses]
+        )
+        for i, citations in zip(misses, retrieved):
+            results[i] = citations
+            # Retrieval returns [] on errors too, so only real results are cached
+            if citations and vectors[i].shape[0] == EMBED_DIMENSION:
+                _cache.store(vectors[i], top_k, citations)
+    return results
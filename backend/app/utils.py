@@ -8,7 +8,13 @@ from typing import List, Tuple
 from pathlib import Path
 import json
 
-from app.config import LOG_LEVEL
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from app.config import LOG_LEVEL, ensure_dir
 
 # Setup logging
 logging.basicConfig(
@@ -124,10 +130,18 @@ def deduplicate_claims(claims: List[dict], similarity_threshold: float = 0.7) ->
 
 
 def save_json(data: dict, filepath: Path) -> None:
-    """Save data to JSON file"""
-    filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    """Save data to JSON file (serialized with orjson when available)"""
+    ensure_dir(filepath.parent)
+    if HAS_ORJSON:
+        # UTF-8 without escaping, like the stdlib call below. Datetimes are passed through to
+        # default=str so they keep the stdlib format; unlike stdlib, NaN/inf are written as null.
+        filepath.write_bytes(orjson.dumps(
+            data, default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        ))
+    else:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
     logger.info(f"Saved JSON to {filepath}")
 
 
@@ -0,0 +1,15 @@
+"""
+pytest configuration: point every storage path at a temporary directory before app.config is imported
+"""
+import os
+import tempfile
+
+_TMP_ROOT = tempfile.mkdtemp(prefix="rag_demo_tests_")
+
+os.environ["RAG_SKIP_DOTENV"] = "1"
+os.environ["REPORTS_DIR"] = os.path.join(_TMP_ROOT, "reports")
+os.environ["CHROMA_DIR"] = os.path.join(_TMP_ROOT, "chroma")
+os.environ.pop("OPENAI_API_KEY", None)
+
+# Manual end-to-end script: needs a running API server and passes values between steps
+collect_ignore = ["test_upload_extract_flow.py"]
@@ -1,37 +1,52 @@
 """
 FastAPI main application for Short Report Rebuttal Assistant
 """
+import asyncio
+import functools
+import hashlib
 import logging
+import multiprocessing
 import os
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from io import BytesIO
 from datetime import datetime
 
+import aiofiles
+import chromadb
+from chromadb.config import Settings
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from app.claim_extract import extract_claims_from_text
-from app.config import CHROMA_DIR, INTERNAL_DATA_DIR, REPORTS_DIR, OPENAI_API_KEY, openai_client
-from app.judge import judge_claim
+from app.claim_extract import extract_claims_from_text, extraction_cache_key
+from app.config import (
+    CHROMA_DIR, INTERNAL_DATA_DIR, REPORTS_DIR, OPENAI_API_KEY, MAX_UPLOAD_BYTES, ensure_dir,
+    create_async_openai_client
+)
+from app.index_internal import index_internal_documents, sync_chroma_generation
+from app.judge import judge_claims_batch
 from app.models import (
     AnalyzeRequest,
     AnalyzeResponse,
     Claim,
-    ClaimAnalysis,
     UploadReportResponse,
     UploadOnlyResponse,
 )
 from app.pdf_extract import extract_document_text
 from app.report import create_analysis_report
-from app.retrieval import retrieve_relevant_documents
+from app.semantic_cache import get_or_retrieve_many
 from app.utils import load_json, logger, save_json
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -42,16 +57,96 @@ logger.info("=" * 80)
 logger.info("Application Startup Configuration")
 logger.info("=" * 80)
 logger.info(f"OPENAI_API_KEY set: {bool(OPENAI_API_KEY)}")
-logger.info(f"OpenAI client initialized: {openai_client is not None}")
 logger.info("=" * 80)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Multipart framing (boundary, part headers) allowed on top of MAX_UPLOAD_BYTES in Content-Length
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Pages of recent uploads (report_id -> (pages, doc_hash)), since extract_claims usually follows right after
+PAGES_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+PAGES_CACHE_SIZE = 32
+
+# Extracted claims keyed by document text hash (see extraction_cache_key), shared across report IDs
+CLAIMS_BY_HASH_DIR = REPORTS_DIR / "claims_by_hash"
+CLAIMS_BY_HASH_MAX_ENTRIES = 1000
+
+# Document parsing is CPU-bound; it runs in a pool of worker processes (app.state.process_pool,
+# created in lifespan) so the event loop stays responsive
+PROCESS_POOL_WORKERS = min(os.cpu_count() or 1, 4)
+
+def open_chroma_client():
+    """Open the persistent ChromaDB client, or return None if the vector DB doesn't exist yet"""
+    if not CHROMA_DIR.exists():
+        return None
+    return chromadb.PersistentClient(
+        path=str(CHROMA_DIR),
+        settings=Settings(anonymized_telemetry=False)
+    )
+
+
+def get_chroma_client():
+    """
+    The app's shared ChromaDB client, opened on first use if the DB appeared after startup
+    and reopened if the index was rebuilt since (possibly by another worker)
+    """
+    generation = sync_chroma_generation()
+    if app.state.chroma is None or app.state.chroma_generation != generation:
+        app.state.chroma = open_chroma_client()
+        app.state.chroma_generation = generation
+    return app.state.chroma
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open one ChromaDB client, LLM connection pool and parsing process pool per worker process, and release them on shutdown"""
+    app.state.chroma = None
+    try:
+        get_chroma_client()
+    except Exception as e:
+        logger.warning(f"Could not open ChromaDB at startup: {e}")
+    # Shared by every LLM call in this worker, so connections (and their TLS sessions) are reused
+    app.state.llm = create_async_openai_client()
+    logger.info(f"OpenAI client initialized: {app.state.llm is not None}")
+    # Spawned, not forked: by now the event loop, ChromaDB and executor threads are running,
+    # and a fork would copy their held locks into the workers
+    app.state.process_pool = ProcessPoolExecutor(
+        max_workers=PROCESS_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+    yield
+    if app.state.llm is not None:
+        await app.state.llm.close()
+    # Stop the document parsing workers
+    app.state.process_pool.shutdown(wait=False, cancel_futures=True)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Short Report Rebuttal Assistant API",
     description="API for analyzing short reports and generating rebuttal analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+
+# Registered before CORS, so CORS wraps it and browsers can read the 413
+@app.middleware("http")
+async def reject_oversize_uploads(request: Request, call_next):
+    """
+    Refuse uploads whose declared Content-Length is over the limit before the body is read
+
+    FastAPI parses (and spools) the whole multipart form before the route runs, so the
+    route's own byte count can only stop the copy into REPORTS_DIR, not the transfer.
+    """
+    if request.url.path == "/api/upload_report":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"}
+            )
+    return await call_next(request)
+
 # CORS middleware - allow frontend origin
 # Get allowed origins from environment variable or use defaults
 ALLOWED_ORIGINS = os.getenv(
@@ -67,6 +162,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/markdown responses and report downloads (small bodies aren't worth it).
+# PDFs are already compressed: gzipping them costs CPU for almost no gain and gives up
+# FileResponse's sendfile path.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/pdf",)
+)
+
+
+def remember_pages(report_id: str, pages, doc_hash: str) -> None:
+    """Keep a report's extracted pages in PAGES_CACHE, evicting the least recently added"""
+    PAGES_CACHE[report_id] = (pages, doc_hash)
+    PAGES_CACHE.move_to_end(report_id)
+    while len(PAGES_CACHE) > PAGES_CACHE_SIZE:
+        PAGES_CACHE.popitem(last=False)
+
+
+def prune_claims_by_hash() -> None:
+    """Delete the least recently written entries beyond CLAIMS_BY_HASH_MAX_ENTRIES"""
+    try:
+        entries = sorted(os.scandir(CLAIMS_BY_HASH_DIR), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:-CLAIMS_BY_HASH_MAX_ENTRIES]:
+            os.unlink(entry.path)
+    except OSError as e:
+        logger.warning(f"Failed to prune {CLAIMS_BY_HASH_DIR}: {e}")
+
+
+def document_hash(pages) -> str:
+    """SHA-256 of a document's extracted text, identifying re-uploads of the same document"""
+    digest = hashlib.sha256()
+    for page_num, text in pages:
+        digest.update(f"Page {page_num}:\n{text}\n\n".encode("utf-8"))
+    return digest.hexdigest()
+
 
 @app.get("/")
 async def root():
@@ -92,12 +222,7 @@ async def health():
     collection_count = 0
     if chroma_exists:
         try:
-            import chromadb
-            from chromadb.config import Settings
-            client = chromadb.PersistentClient(
-                path=str(CHROMA_DIR),
-                settings=Settings(anonymized_telemetry=False)
-            )
+            client = get_chroma_client()
             try:
                 collection = client.get_collection("internal_documents")
                 collection_exists = True
@@ -122,20 +247,13 @@ async def check_and_index():
     Check if vector DB exists and has data, if not, index company_data.pdf
     """
     try:
-        import chromadb
-        from app.index_internal import index_internal_documents
-        from chromadb.config import Settings
-        
         # Check if collection exists and has data
         collection_exists = False
         collection_count = 0
         
         if CHROMA_DIR.exists():
             try:
-                client = chromadb.PersistentClient(
-                    path=str(CHROMA_DIR),
-                    settings=Settings(anonymized_telemetry=False)
-                )
+                client = get_chroma_client()
                 collection = client.get_collection("internal_documents")
                 collection_exists = True
                 collection_count = collection.count()
@@ -167,12 +285,10 @@ async def check_and_index():
                 "error": error_trace
             }
         
-        # Check again after indexing
+        # Check again after indexing (indexing may have replaced the DB directory, so reopen)
         try:
-            client = chromadb.PersistentClient(
-                path=str(CHROMA_DIR),
-                settings=Settings(anonymized_telemetry=False)
-            )
+            app.state.chroma = None
+            client = get_chroma_client()
             collection = client.get_collection("internal_documents")
             final_count = collection.count()
             
@@ -223,30 +339,43 @@ async def upload_report(file: UploadFile = File(...)):
     extracted_path = REPORTS_DIR / f"{report_id}.extracted.json"
 
     try:
-        report_path.parent.mkdir(parents=True, exist_ok=True)
-        # Save uploaded file
-        with open(report_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        ensure_dir(REPORTS_DIR)
+        # Save uploaded file in 1MB chunks so large uploads neither sit in memory
+        # nor block the event loop while being written
+        # (the size is enforced here too: Content-Length may be missing or include form overhead)
+        written = 0
+        async with aiofiles.open(report_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    break
+                await f.write(chunk)
+        if written > MAX_UPLOAD_BYTES:
+            report_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=413, detail=f"File too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
 
         logger.info(f"Saved report {report_id} to {report_path}")
 
         # Extract text from document (for later use in claim extraction)
-        pages = extract_document_text(report_path)
+        loop = asyncio.get_running_loop()
+        pages = await loop.run_in_executor(app.state.process_pool, extract_document_text, report_path)
         if not pages:
             raise HTTPException(status_code=400, detail=f"Failed to extract text from {file_ext} file")
 
         # Save extracted document text for later claim extraction
+        doc_hash = document_hash(pages)
         save_json(
             {
                 "report_id": report_id,
                 "filename": file.filename,
                 "file_type": file_ext,
                 "extracted_at": datetime.now().isoformat(),
+                "doc_hash": doc_hash,
                 "pages": pages
             },
             extracted_path
         )
+        remember_pages(report_id, pages, doc_hash)
 
         logger.info(f"Saved extracted text for report {report_id}")
 
@@ -299,29 +428,51 @@ async def extract_claims(request: AnalyzeRequest):
                 )
 
         # Extract claims for the first time
-        extracted_data = load_json(extracted_path)
-        pages = extracted_data.get("pages", [])
+        # Just uploaded to this worker: skip re-reading and parsing .extracted.json
+        cached_pages = PAGES_CACHE.get(report_id)
+        if cached_pages is not None:
+            pages, doc_hash = cached_pages
+        else:
+            extracted_data = load_json(extracted_path)
+            pages = extracted_data.get("pages", [])
+            doc_hash = extracted_data.get("doc_hash")
 
         if not pages:
             raise HTTPException(status_code=400, detail="No document text found. Please upload a document.")
 
-        # Perform LLM-based claim extraction
-        full_text = "\n\n".join([f"Page {pnum}:\n{text}" for pnum, text in pages])
-        claims = extract_claims_from_text(full_text, pages)
-
-        if not claims:
-            raise HTTPException(status_code=400, detail="Failed to extract claims from report")
+        loop = asyncio.get_running_loop()
 
-        # Cache the extracted claims
-        save_json(
-            {
-                "report_id": report_id,
-                "claims": [c.dict() for c in claims],
-                "pages": pages,
-                "extracted_at": datetime.now().isoformat()
-            },
-            claims_path
-        )
+        # The same document uploaded under another report ID already has claims
+        doc_hash = doc_hash or document_hash(pages)
+        hash_claims_path = CLAIMS_BY_HASH_DIR / f"{extraction_cache_key(doc_hash)}.json"
+        claims = None
+        if hash_claims_path.exists():
+            claims_data = load_json(hash_claims_path).get("claims", [])
+            if claims_data:
+                claims = [Claim(**c) for c in claims_data]
+                logger.info(f"Reusing claims extracted from identical document {doc_hash[:12]}")
+
+        if claims is None:
+            # Perform LLM-based claim extraction
+            full_text = "\n\n".join(f"Page {pnum}:\n{text}" for pnum, text in pages)
+            # LLM round-trip on the shared async client, so other requests are served meanwhile
+            claims = await extract_claims_from_text(full_text, pages, app.state.llm)
+
+            if not claims:
+                raise HTTPException(status_code=400, detail="Failed to extract claims from report")
+
+        # Cache the extracted claims, for this report and for any later upload of the same document
+        claims_record = {
+            "report_id": report_id,
+            "doc_hash": doc_hash,
+            "claims": [c.model_dump() for c in claims],
+            "pages": pages,
+            "extracted_at": datetime.now().isoformat()
+        }
+        await loop.run_in_executor(None, save_json, claims_record, claims_path)
+        if not hash_claims_path.exists():
+            await loop.run_in_executor(None, save_json, claims_record, hash_claims_path)
+            await loop.run_in_executor(None, prune_claims_by_hash)
 
         logger.info(f"Extracted {len(claims)} claims from report {report_id}")
 
@@ -363,35 +514,31 @@ async def analyze_claims(request: AnalyzeRequest):
     claims = [Claim(**c) for c in claims_data[:max_claims]]
     logger.info(f"Analyzing {len(claims)} claims for report {report_id}")
     
-    analyses = []
+    loop = asyncio.get_running_loop()
     
-    for i, claim in enumerate(claims, 1):
-        logger.info(f"Processing claim {i}/{len(claims)}: {claim.claim_id}")
-        
-        try:
-            citations = retrieve_relevant_documents(claim.claim_text, top_k=top_k)
-            analysis = judge_claim(claim, citations)
-            analyses.append(analysis)
-            
-        except Exception as e:
-            logger.error(f"Error analyzing claim {claim.claim_id}: {e}")
-            analyses.append(ClaimAnalysis(
-                claim_id=claim.claim_id,
-                coverage="not_addressed",
-                reasoning=f"Error occurred during processing: {str(e)}",
-                citations=[],
-                confidence=0,
-                gaps=["Requires reprocessing"],
-                recommended_actions=["Check system errors"]
-            ))
+    # Retrieve evidence for all claims at once: one embedding request and one ChromaDB query
+    logger.info(f"Retrieving evidence for {len(claims)} claims")
+    try:
+        citations_per_claim = await loop.run_in_executor(
+            None, get_or_retrieve_many, [claim.claim_text for claim in claims], top_k
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving evidence: {e}")
+        citations_per_claim = [[] for _ in claims]
+    
+    # Judge every claim concurrently (bounded, to stay under LLM rate limits)
+    analyses = await judge_claims_batch(list(zip(claims, citations_per_claim)), app.state.llm)
     
     report = create_analysis_report(report_id, claims, analyses)
     
     report_json_path = REPORTS_DIR / f"{report_id}.report.json"
     report_md_path = REPORTS_DIR / f"{report_id}.report.md"
     
-    save_json(report.json_data, report_json_path)
-    report_md_path.write_text(report.markdown, encoding='utf-8')
+    # Write both files off the event loop
+    await asyncio.gather(
+        loop.run_in_executor(None, save_json, report.json_data, report_json_path),
+        loop.run_in_executor(None, functools.partial(report_md_path.write_text, report.markdown, encoding='utf-8'))
+    )
     
     logger.info(f"Generated report for {report_id}")
     
@@ -401,13 +548,12 @@ async def analyze_claims(request: AnalyzeRequest):
     )
 
 
+@functools.lru_cache(maxsize=1)
 def get_chinese_font_name() -> str:
     """
     Find and register a Chinese font from the system
-    Returns the font name to use in PDF generation
+    Returns the font name to use in PDF generation (looked up once per process)
     """
-    import os
-
     # Try common Windows Chinese font locations
     possible_paths = [
         r'C:\Windows\Fonts\SimSun.ttc',      # Simplified Chinese (most common)
@@ -433,6 +579,72 @@ def get_chinese_font_name() -> str:
     return 'Helvetica'
 
 
+# PDF font and styles are the same for every report, so build them once at import
+FONT_NAME = get_chinese_font_name()
+
+_styles = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_styles['Heading1'],
+    fontName=FONT_NAME,
+    fontSize=16,
+    textColor='black',
+    spaceAfter=12,
+    alignment=1  # Center
+)
+
+H2_STYLE = ParagraphStyle(
+    'CustomH2',
+    parent=_styles['Heading2'],
+    fontName=FONT_NAME,
+    fontSize=13,
+    textColor='black',
+    spaceAfter=8,
+    spaceBefore=8
+)
+
+H3_STYLE = ParagraphStyle(
+    'CustomH3',
+    parent=_styles['Heading3'],
+    fontName=FONT_NAME,
+    fontSize=11,
+    textColor='black',
+    spaceAfter=6,
+    spaceBefore=6
+)
+
+BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_styles['BodyText'],
+    fontName=FONT_NAME,
+    fontSize=10,
+    alignment=0,  # Left
+    spaceAfter=6
+)
+
+BULLET_STYLE = ParagraphStyle(
+    'CustomBullet',
+    parent=_styles['BodyText'],
+    fontName=FONT_NAME,
+    fontSize=10,
+    leftIndent=20,
+    spaceAfter=4
+)
+
+
+BULLET_PREFIX = "• "
+
+# (line prefix, prefix length, style, text marker); "### " must come before "## " and "# ".
+# A style of None drops the line: the H1 is already rendered as the document title.
+MARKDOWN_RULES = (
+    ("### ", 4, H3_STYLE, ""),
+    ("## ", 3, H2_STYLE, ""),
+    ("# ", 2, None, ""),
+    ("- ", 2, BULLET_STYLE, BULLET_PREFIX),
+    ("* ", 2, BULLET_STYLE, BULLET_PREFIX),
+)
+
+
 def markdown_to_pdf(markdown_text: str, title: str) -> BytesIO:
     """
     Convert markdown text to PDF with Unicode support for Chinese characters
@@ -440,9 +652,6 @@ def markdown_to_pdf(markdown_text: str, title: str) -> BytesIO:
     """
     pdf_buffer = BytesIO()
 
-    # Get registered Chinese font
-    font_name = get_chinese_font_name()
-
     # Create PDF document
     doc = SimpleDocTemplate(
         pdf_buffer,
@@ -453,88 +662,27 @@ def markdown_to_pdf(markdown_text: str, title: str) -> BytesIO:
         bottomMargin=0.75 * inch
     )
 
-    # Create styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=font_name,
-        fontSize=16,
-        textColor='black',
-        spaceAfter=12,
-        alignment=1  # Center
-    )
-
-    h2_style = ParagraphStyle(
-        'CustomH2',
-        parent=styles['Heading2'],
-        fontName=font_name,
-        fontSize=13,
-        textColor='black',
-        spaceAfter=8,
-        spaceBefore=8
-    )
-
-    h3_style = ParagraphStyle(
-        'CustomH3',
-        parent=styles['Heading3'],
-        fontName=font_name,
-        fontSize=11,
-        textColor='black',
-        spaceAfter=6,
-        spaceBefore=6
-    )
-
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontName=font_name,
-        fontSize=10,
-        alignment=0,  # Left
-        spaceAfter=6
-    )
-
-    bullet_style = ParagraphStyle(
-        'CustomBullet',
-        parent=styles['BodyText'],
-        fontName=font_name,
-        fontSize=10,
-        leftIndent=20,
-        spaceAfter=4
-    )
-
     # Build content
     story = []
-    story.append(Paragraph(title, title_style))
+    story.append(Paragraph(title, TITLE_STYLE))
     story.append(Spacer(1, 0.3 * inch))
 
-    # Process markdown
-    lines = markdown_text.split('\n')
-    for line in lines:
-        if line.startswith('# '):
-            # H1 (skip, already added as title)
-            continue
-        elif line.startswith('## '):
-            # H2
-            text = line[3:].strip()
-            if text:
-                story.append(Paragraph(text, h2_style))
-        elif line.startswith('### '):
-            # H3
-            text = line[4:].strip()
-            if text:
-                story.append(Paragraph(text, h3_style))
-        elif line.startswith('- ') or line.startswith('* '):
-            # Bullet point
-            text = line[2:].strip()
-            if text:
-                story.append(Paragraph(f"• {text}", bullet_style))
-        elif line.strip():
-            # Regular paragraph
-            story.append(Paragraph(line.strip(), body_style))
+    # Process markdown: the first rule whose prefix matches decides how a line is rendered
+    for line in markdown_text.splitlines():
+        for prefix, prefix_len, style, marker in MARKDOWN_RULES:
+            if line.startswith(prefix):
+                if style is not None:
+                    text = line[prefix_len:].strip()
+                    if text:
+                        story.append(Paragraph(marker + text, style))
+                break
         else:
-            # Empty line - add small spacer
-            story.append(Spacer(1, 0.1 * inch))
+            if line.strip():
+                # Regular paragraph
+                story.append(Paragraph(line.strip(), BODY_STYLE))
+            else:
+                # Empty line - add small spacer
+                story.append(Spacer(1, 0.1 * inch))
 
     # Build PDF
     doc.build(story)
@@ -542,6 +690,14 @@ def markdown_to_pdf(markdown_text: str, title: str) -> BytesIO:
     return pdf_buffer
 
 
+def build_report_pdf(md_path: Path, pdf_path: Path, title: str) -> None:
+    """Render a markdown report to pdf_path (written atomically, so concurrent downloads never see a partial file)"""
+    pdf_buffer = markdown_to_pdf(md_path.read_text(encoding='utf-8'), title)
+    tmp_path = pdf_path.with_name(f"{pdf_path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(pdf_buffer.getbuffer())
+    os.replace(tmp_path, pdf_path)
+
+
 @app.get("/api/download_report/{report_id}")
 async def download_report(report_id: str, format: str = "md"):
     """
@@ -574,17 +730,20 @@ async def download_report(report_id: str, format: str = "md"):
         if not md_file_path.exists():
             raise HTTPException(status_code=404, detail=f"Report {report_id} not found")
 
+        pdf_path = REPORTS_DIR / f"{report_id}.report.pdf"
         try:
-            # Read markdown content
-            markdown_content = md_file_path.read_text(encoding='utf-8')
-
-            # Convert to PDF
-            pdf_bytes = markdown_to_pdf(markdown_content, f"Report {report_id}")
-
-            return StreamingResponse(
-                iter([pdf_bytes.getvalue()]),
+            # Rebuild only if the markdown is newer than the last PDF built from it
+            if not (pdf_path.exists() and pdf_path.stat().st_mtime >= md_file_path.stat().st_mtime):
+                # CPU-bound ReportLab layout, so keep it off the event loop
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, build_report_pdf, md_file_path, pdf_path, f"Report {report_id}")
+            else:
+                logger.info(f"Serving cached PDF for report {report_id}")
+
+            return FileResponse(
+                path=str(pdf_path),
                 media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename=report_{report_id}.pdf"}
+                filename=f"report_{report_id}.pdf"
             )
         except Exception as e:
             logger.error(f"Error generating PDF: {e}")
@@ -596,4 +755,21 @@ async def download_report(report_id: str, format: str = "md"):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    # Each worker is a separate process with its own ChromaDB client and in-memory caches,
+    # which follow re-indexing done by other workers via index_generation(). uvicorn's
+    # default "auto" loop and HTTP parser already use uvloop and httptools when installed.
+    workers = int(os.getenv("WEB_CONCURRENCY", min(os.cpu_count() or 1, 4)))
+    if workers > 1:
+        # Workers import the app themselves, so it goes by import string; app_dir makes
+        # that work from any working directory
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=workers,
+            app_dir=str(Path(__file__).resolve().parent)
+        )
+    else:
+        # Serve the app object already imported here, instead of importing main a second time
+        uvicorn.run(app, host="0.0.0.0", port=8000)
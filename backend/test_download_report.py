@@ -0,0 +1,36 @@
+"""
+Unit tests for report downloads: gzip applies to text formats but not to PDFs
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def report_id():
+    report_id = "test-download"
+    main.REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    markdown = "# Report\n\n" + "\n".join(f"- Claim {i}: partially addressed" for i in range(200))
+    (main.REPORTS_DIR / f"{report_id}.report.md").write_text(markdown, encoding="utf-8")
+    return report_id
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_markdown_download_is_gzipped(client, report_id):
+    response = client.get(f"/api/download_report/{report_id}", params={"format": "md"})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == "gzip"
+
+
+def test_pdf_download_is_not_gzipped(client, report_id):
+    response = client.get(f"/api/download_report/{report_id}", params={"format": "pdf"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert "content-encoding" not in response.headers
+    assert response.content.startswith(b"%PDF")
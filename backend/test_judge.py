@@ -0,0 +1,121 @@
+"""
+Unit tests for the judge's response parsing, rule-based routing and batch judging
+"""
+import asyncio
+import json
+
+import pytest
+
+from app import judge
+from app.judge import (
+    RULE_MIN_SIMILARITY, _extract_first_json_object, _has_strong_matching_evidence, _loads_json, _pick_model,
+    error_analysis, judge_claims_batch
+)
+from app.models import Citation, Claim
+
+
+def make_claim(claim_id="C001", text="Store count grew 338% between 2019 and 2023", claim_type="metrics"):
+    return Claim(claim_id=claim_id, claim_text=text, page_numbers=[1], claim_type=claim_type)
+
+
+def make_citation(quote, similarity=0.9, chunk_id="doc_chunk_0"):
+    return Citation(doc_id="doc", doc_title="doc.pdf", chunk_id=chunk_id, quote=quote, similarity_score=similarity)
+
+
+# --- JSON parsing ---
+
+def test_loads_json_parses_object():
+    assert _loads_json('{"coverage": "fully_addressed", "confidence": 90}') == {
+        "coverage": "fully_addressed",
+        "confidence": 90
+    }
+
+
+def test_loads_json_raises_stdlib_error_on_invalid_input():
+    # Callers catch json.JSONDecodeError whichever parser is in use
+    with pytest.raises(json.JSONDecodeError):
+        _loads_json("not json")
+
+
+def test_extract_object_from_markdown_fence():
+    text = 'Here you go:\n```json\n{"coverage": "not_addressed", "gaps": ["a"]}\n```'
+    assert json.loads(_extract_first_json_object(text)) == {"coverage": "not_addressed", "gaps": ["a"]}
+
+
+def test_extract_object_ignores_braces_in_strings():
+    text = 'prefix {"reasoning": "uses } and { and \\" inside", "nested": {"x": 1}} trailing {"y": 2}'
+    assert json.loads(_extract_first_json_object(text)) == {
+        "reasoning": 'uses } and { and " inside',
+        "nested": {"x": 1}
+    }
+
+
+@pytest.mark.parametrize("text", ["no braces at all", '{"unterminated": 1'])
+def test_extract_object_returns_none_without_complete_object(text):
+    assert _extract_first_json_object(text) is None
+
+
+# --- Rule-based routing ---
+
+def strong_citations():
+    return [
+        make_citation("Stores grew 338% over the period", chunk_id="doc_chunk_0"),
+        make_citation("Expansion plan details", chunk_id="doc_chunk_1")
+    ]
+
+
+def test_strong_evidence_with_similar_citations_quoting_the_figure():
+    assert _has_strong_matching_evidence(make_claim(), strong_citations())
+
+
+def test_no_strong_evidence_below_similarity_threshold():
+    citations = [
+        make_citation("Stores grew 338%", chunk_id="doc_chunk_0"),
+        make_citation("Stores grew 338%", similarity=RULE_MIN_SIMILARITY - 0.01, chunk_id="doc_chunk_1")
+    ]
+    assert not _has_strong_matching_evidence(make_claim(), citations)
+
+
+def test_no_strong_evidence_when_only_years_match():
+    # Bare years and single digits are too common to count as a matching figure
+    citations = [
+        make_citation("Results for 2019 and 2023", chunk_id="doc_chunk_0"),
+        make_citation("Store openings since 2019", chunk_id="doc_chunk_1")
+    ]
+    assert not _has_strong_matching_evidence(make_claim(), citations)
+
+
+def test_strong_evidence_routes_to_small_model_only_when_enabled(monkeypatch):
+    claim = make_claim(claim_type="accounting")
+    monkeypatch.setattr(judge, "JUDGE_RULE_ROUTING", False)
+    assert _pick_model(claim, strong_citations()) == judge.LLM_MODEL_LARGE
+    monkeypatch.setattr(judge, "JUDGE_RULE_ROUTING", True)
+    assert _pick_model(claim, strong_citations()) == judge.LLM_MODEL_SMALL
+
+
+def test_strong_evidence_is_still_judged_by_the_llm(monkeypatch):
+    monkeypatch.setattr(judge, "JUDGE_RULE_ROUTING", True)
+    monkeypatch.setattr(judge, "get_cached_analysis", lambda *args: None)
+    analysis, _, model, messages = judge._prepare_judgment(make_claim(), strong_citations())
+    assert analysis is None
+    assert messages is not None
+
+
+# --- Batch judging ---
+
+def test_batch_keeps_input_order_and_isolates_failures(monkeypatch):
+    claims = [make_claim(f"C00{i}") for i in range(3)]
+
+    async def fake_judge_claim(claim, citations, client, on_coverage=None):
+        if claim.claim_id == "C001":
+            raise ConnectionError("boom")
+        # Finish in reverse order to check results are not collected by completion
+        await asyncio.sleep(0.01 * (3 - int(claim.claim_id[-1])))
+        return error_analysis(claim, ValueError(claim.claim_id))
+
+    monkeypatch.setattr(judge, "judge_claim", fake_judge_claim)
+    analyses = asyncio.run(judge_claims_batch([(claim, []) for claim in claims], client=None, max_concurrency=2))
+
+    assert [a.claim_id for a in analyses] == ["C000", "C001", "C002"]
+    assert "boom" in analyses[1].reasoning
+    assert analyses[1].confidence == 0
@@ -0,0 +1,101 @@
+"""
+Unit tests for the judge cache: key composition, TTL, pruning and clearing
+"""
+import pytest
+
+from app import judge_cache
+from app.judge_cache import clear_judge_cache, get_cached_analysis, make_cache_key, store_analysis
+from app.models import Citation, Claim, ClaimAnalysis
+
+
+def make_claim(claim_id="C001", text="Revenue grew 45% in 2023"):
+    return Claim(claim_id=claim_id, claim_text=text, page_numbers=[1], claim_type="metrics")
+
+
+def make_citation(chunk_id="doc_chunk_0", quote="Revenue grew 45% year over year"):
+    return Citation(doc_id="doc", doc_title="doc.pdf", chunk_id=chunk_id, quote=quote, similarity_score=0.9)
+
+
+def make_analysis(claim_id="C001", citations=None):
+    return ClaimAnalysis(
+        claim_id=claim_id,
+        coverage="partially_addressed",
+        reasoning="• Some evidence",
+        citations=citations or [],
+        confidence=60
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_judge_cache()
+    yield
+    clear_judge_cache()
+
+
+def test_key_ignores_claim_id_and_whitespace():
+    citations = [make_citation()]
+    assert make_cache_key(make_claim("C001"), citations) == make_cache_key(
+        make_claim("C009", "  revenue   grew 45% in 2023 "), citations
+    )
+
+
+def test_key_ignores_citation_order():
+    a, b = make_citation("doc_chunk_0"), make_citation("doc_chunk_1", "Other text")
+    assert make_cache_key(make_claim(), [a, b]) == make_cache_key(make_claim(), [b, a])
+
+
+def test_key_changes_with_evidence_text():
+    # Re-indexing keeps chunk IDs, so edited evidence must still produce a new key
+    old = [make_citation(quote="Revenue grew 45%")]
+    new = [make_citation(quote="Revenue grew 12%")]
+    assert make_cache_key(make_claim(), old) != make_cache_key(make_claim(), new)
+
+
+def test_key_changes_with_model():
+    citations = [make_citation()]
+    assert make_cache_key(make_claim(), citations, "model-a") != make_cache_key(make_claim(), citations, "model-b")
+
+
+def test_round_trip_relabels_claim_and_citations():
+    citations = [make_citation()]
+    store_analysis(make_claim("C001"), citations, make_analysis("C001", citations))
+
+    fresh_citations = [make_citation()]
+    cached = get_cached_analysis(make_claim("C007"), fresh_citations)
+    assert cached is not None
+    assert cached.claim_id == "C007"
+    assert cached.coverage == "partially_addressed"
+    assert cached.citations == fresh_citations
+
+
+def test_miss_for_different_evidence():
+    store_analysis(make_claim(), [make_citation()], make_analysis())
+    assert get_cached_analysis(make_claim(), [make_citation(quote="Something else")]) is None
+
+
+def test_expired_entries_are_ignored(monkeypatch):
+    monkeypatch.setattr(judge_cache, "CACHE_TTL_SECONDS", -1)
+    citations = [make_citation()]
+    store_analysis(make_claim(), citations, make_analysis())
+    assert get_cached_analysis(make_claim(), citations) is None
+
+
+def test_expired_entries_are_deleted_on_write(monkeypatch):
+    monkeypatch.setattr(judge_cache, "CACHE_TTL_SECONDS", -1)
+    store_analysis(make_claim(), [make_citation()], make_analysis())
+    monkeypatch.setattr(judge_cache, "CACHE_TTL_SECONDS", 3600)
+    store_analysis(make_claim(text="Margins fell"), [make_citation()], make_analysis())
+
+    conn = judge_cache._connect()
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM judgments").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_clear_removes_entries():
+    citations = [make_citation()]
+    store_analysis(make_claim(), citations, make_analysis())
+    clear_judge_cache()
+    assert get_cached_analysis(make_claim(), citations) is None
@@ -0,0 +1,53 @@
+"""
+Unit tests for the ClaimAnalysis validators that normalize loosely typed LLM output
+"""
+from app.models import ClaimAnalysis
+
+
+def analysis(**overrides):
+    data = {
+        "claim_id": "C001",
+        "coverage": "partially_addressed",
+        "reasoning": "• Some evidence",
+        "citations": [],
+        "confidence": 50
+    }
+    data.update(overrides)
+    return ClaimAnalysis.model_validate(data)
+
+
+def test_unknown_coverage_becomes_not_addressed():
+    assert analysis(coverage="mostly_addressed").coverage == "not_addressed"
+
+
+def test_reasoning_list_is_joined_as_bullets():
+    assert analysis(reasoning=["first", "• second", 3]).reasoning == "• first\n• second\n• 3"
+
+
+def test_non_string_reasoning_is_stringified():
+    assert analysis(reasoning={"a": 1}).reasoning == "{'a': 1}"
+
+
+def test_confidence_is_coerced_and_clamped():
+    assert analysis(confidence="85").confidence == 85
+    assert analysis(confidence=150).confidence == 100
+    assert analysis(confidence=-5).confidence == 0
+
+
+def test_fully_addressed_drops_gaps():
+    result = analysis(coverage="fully_addressed", gaps=["missing audit"])
+    assert result.gaps is None
+    assert result.recommended_actions is None
+
+
+def test_other_coverage_gets_default_actions():
+    assert analysis(coverage="not_addressed").recommended_actions == [
+        "Requires further investigation",
+        "Collect more evidence"
+    ]
+
+
+def test_explicit_actions_are_kept_and_empty_gaps_become_none():
+    result = analysis(gaps=[], recommended_actions=["Call the CFO"])
+    assert result.gaps is None
+    assert result.recommended_actions == ["Call the CFO"]
@@ -0,0 +1,69 @@
+"""
+Unit tests for the extract_document_text cache: JSON storage, extractor versioning and pruning
+"""
+import pytest
+
+from app import pdf_extract
+from app.pdf_extract import extract_document_text
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    conn = pdf_extract._connect_extract_cache()
+    try:
+        with conn:
+            conn.execute("DELETE FROM extracted_pages")
+    finally:
+        conn.close()
+
+
+def cached_rows():
+    conn = pdf_extract._connect_extract_cache()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM extracted_pages").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def count_parses(monkeypatch):
+    calls = []
+    original = pdf_extract.extract_txt_text
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(pdf_extract, "extract_txt_text", counting)
+    return calls
+
+
+def test_second_extraction_is_served_from_cache(tmp_path, monkeypatch):
+    calls = count_parses(monkeypatch)
+    first = tmp_path / "a.txt"
+    first.write_text("Revenue grew 45% — année record", encoding="utf-8")
+    copy = tmp_path / "b.txt"
+    copy.write_bytes(first.read_bytes())
+
+    assert extract_document_text(first) == [(1, "Revenue grew 45% — année record")]
+    assert extract_document_text(copy) == [(1, "Revenue grew 45% — année record")]
+    assert len(calls) == 1
+
+
+def test_extractor_version_change_misses(tmp_path, monkeypatch):
+    calls = count_parses(monkeypatch)
+    path = tmp_path / "a.txt"
+    path.write_text("Revenue grew 45%", encoding="utf-8")
+
+    extract_document_text(path)
+    monkeypatch.setattr(pdf_extract, "EXTRACTOR_VERSION", pdf_extract.EXTRACTOR_VERSION + 1)
+    extract_document_text(path)
+    assert len(calls) == 2
+
+
+def test_cache_keeps_only_newest_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_extract, "EXTRACT_CACHE_MAX_ENTRIES", 2)
+    for i in range(4):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(f"document {i}", encoding="utf-8")
+        extract_document_text(path)
+    assert cached_rows() == 2
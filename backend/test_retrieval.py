@@ -0,0 +1,22 @@
+"""
+Unit tests for converting ChromaDB distances to similarity scores
+"""
+import pytest
+
+from app.retrieval import _citations_from_results, _distance_to_similarity
+
+
+@pytest.mark.parametrize("space, distance", [("cosine", 0.4), ("ip", 0.4), ("l2", 0.8)])
+def test_distance_to_similarity_gives_cosine_in_every_space(space, distance):
+    # Unit vectors at cosine 0.6: cosine/ip distance 0.4, squared L2 distance 0.8
+    assert _distance_to_similarity(distance, space) == pytest.approx(0.6)
+
+
+def test_citation_similarity_is_clamped():
+    results = {
+        "ids": [["a", "b"]],
+        "metadatas": [[{"doc_title": "doc.pdf"}, {"doc_title": "doc.pdf"}]],
+        "documents": [["close", "far"]],
+        "distances": [[-0.0001, 3.5]]
+    }
+    assert [c.similarity_score for c in _citations_from_results(results, 0, "l2")] == [1.0, 0.0]
@@ -0,0 +1,69 @@
+"""
+Unit tests for SemanticCache: hits, misses, LRU eviction, growth and index-generation invalidation
+"""
+import numpy as np
+
+from app.semantic_cache import SIMILARITY_THRESHOLD, SemanticCache
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_empty_cache_misses():
+    assert SemanticCache(capacity=4, dimension=3).lookup(unit(1, 0, 0), top_k=6) is None
+
+
+def test_hit_on_near_duplicate_returns_top_k_prefix():
+    cache = SemanticCache(capacity=4, dimension=3)
+    cache.store(unit(1, 0, 0), 6, list("abcdef"))
+    assert cache.lookup(unit(1, 0.01, 0), top_k=4) == list("abcd")
+
+
+def test_miss_below_similarity_threshold():
+    cache = SemanticCache(capacity=4, dimension=3)
+    cache.store(unit(1, 0, 0), 6, ["a"])
+    query = unit(1, 1, 0)
+    assert float(query @ unit(1, 0, 0)) < SIMILARITY_THRESHOLD
+    assert cache.lookup(query, top_k=6) is None
+
+
+def test_entry_with_smaller_top_k_cannot_answer():
+    cache = SemanticCache(capacity=4, dimension=3)
+    cache.store(unit(1, 0, 0), 3, list("abc"))
+    assert cache.lookup(unit(1, 0, 0), top_k=6) is None
+
+
+def test_evicts_least_recently_used():
+    cache = SemanticCache(capacity=2, dimension=3)
+    cache.store(unit(1, 0, 0), 6, ["x"])
+    cache.store(unit(0, 1, 0), 6, ["y"])
+    # Touch x so y becomes the least recently used entry
+    assert cache.lookup(unit(1, 0, 0), top_k=6) == ["x"]
+    cache.store(unit(0, 0, 1), 6, ["z"])
+
+    assert cache.lookup(unit(0, 1, 0), top_k=6) is None
+    assert cache.lookup(unit(1, 0, 0), top_k=6) == ["x"]
+    assert cache.lookup(unit(0, 0, 1), top_k=6) == ["z"]
+
+
+def test_matrix_grows_on_demand_up_to_capacity():
+    cache = SemanticCache(capacity=100, dimension=3)
+    assert cache._vectors.shape[0] == 0
+    for i in range(70):
+        cache.store(unit(1, i, 0), 6, [i])
+    assert cache._vectors.shape[0] == 100
+    assert cache.lookup(unit(1, 0, 0), top_k=6) == [0]
+
+
+def test_generation_change_clears_entries():
+    cache = SemanticCache(capacity=4, dimension=3)
+    cache.sync_generation(1)
+    cache.store(unit(1, 0, 0), 6, ["a"])
+
+    cache.sync_generation(1)
+    assert cache.lookup(unit(1, 0, 0), top_k=6) == ["a"]
+
+    cache.sync_generation(2)
+    assert cache.lookup(unit(1, 0, 0), top_k=6) is None
@@ -0,0 +1,58 @@
+"""
+Unit tests for the upload size limit (HTTP 413)
+"""
+import pytest
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+import main
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def saved_uploads():
+    if not main.REPORTS_DIR.exists():
+        return set()
+    return {path.name for path in main.REPORTS_DIR.glob("*.txt")}
+
+
+def test_oversize_content_length_is_rejected_before_the_route(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(main, "UPLOAD_FORM_OVERHEAD_BYTES", 512)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("route should not run")
+
+    # The route only ever reads the form through UploadFile.read
+    monkeypatch.setattr(UploadFile, "read", fail)
+    before = saved_uploads()
+
+    response = client.post("/api/upload_report", files={"file": ("big.txt", b"x" * 4096, "text/plain")})
+
+    assert response.status_code == 413
+    assert saved_uploads() == before
+
+
+def test_oversize_upload_is_rejected_while_streaming(client, monkeypatch):
+    # Within the Content-Length allowance for form overhead, so the streamed byte count decides
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_SIZE", 256)
+    before = saved_uploads()
+
+    response = client.post("/api/upload_report", files={"file": ("big.txt", b"x" * 2048, "text/plain")})
+
+    assert response.status_code == 413
+    assert saved_uploads() == before
+
+
+def test_upload_within_limit_is_accepted(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 4096)
+
+    response = client.post("/api/upload_report", files={"file": ("small.txt", b"Revenue grew 45%.", "text/plain")})
+
+    assert response.status_code == 200
+    assert response.json()["file_type"] == ".txt"